@@ -0,0 +1,52 @@
+"""
+Middleware ASGI que limita o tamanho do corpo das requisições.
+
+Rejeita com 413 antes de o corpo ser recebido quando o Content-Length já
+excede o limite, e interrompe a leitura de corpos sem Content-Length
+(chunked) assim que o limite é ultrapassado.
+"""
+
+from fastapi import HTTPException, status
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class BodySizeLimitMiddleware:
+    """Limita o corpo das requisições HTTP a max_body_size bytes"""
+
+    def __init__(self, app: ASGIApp, max_body_size: int) -> None:
+        self.app = app
+        self.max_body_size = max_body_size
+
+    def _too_large(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Requisição muito grande. Máximo: {self.max_body_size // (1024 * 1024)}MB"
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_size:
+            # Responder sem ler o corpo
+            error = self._too_large()
+            response = ORJSONResponse(status_code=error.status_code, content={"detail": error.detail})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # Propagado como HTTPException pelo parser do corpo do FastAPI
+                    raise self._too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,70 @@
+"""
+Cursores opacos para a paginação por keyset da listagem de transcrições.
+
+O cursor carrega (created_at, job_id) do último item entregue e é assinado
+com HMAC junto com o ID do usuário: o cliente não consegue forjar posições
+nem reaproveitar o cursor de outro usuário.
+"""
+
+import base64
+import hashlib
+import hmac
+from datetime import datetime
+from typing import Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+_SIGNATURE_SIZE = 16
+
+
+def _sign(user_id: int, payload: bytes) -> bytes:
+    key = settings.JWT_SECRET_KEY.encode()
+    message = str(user_id).encode() + b":" + payload
+    return hmac.new(key, message, hashlib.sha256).digest()[:_SIGNATURE_SIZE]
+
+
+def encode_cursor(user_id: int, created_at: datetime, job_id: str) -> str:
+    """
+    Gera o cursor que aponta para depois do item (created_at, job_id).
+
+    Args:
+        user_id: Dono da listagem
+        created_at: created_at do último item (como veio do banco)
+        job_id: ID do último item
+
+    Returns:
+        Cursor em base64 url-safe
+    """
+    payload = f"{created_at.isoformat()}|{job_id}".encode()
+    token = _sign(user_id, payload) + payload
+    return base64.urlsafe_b64encode(token).rstrip(b"=").decode()
+
+
+def decode_cursor(user_id: int, cursor: str) -> Tuple[datetime, str]:
+    """
+    Valida e decodifica um cursor gerado por encode_cursor.
+
+    Args:
+        user_id: Usuário autenticado
+        cursor: Valor recebido em ?cursor=
+
+    Returns:
+        Tuple[datetime, str]: (created_at, job_id) do último item já entregue
+
+    Raises:
+        HTTPException 400: Se o cursor for inválido ou de outro usuário
+    """
+    try:
+        token = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        signature, payload = token[:_SIGNATURE_SIZE], token[_SIGNATURE_SIZE:]
+        if not hmac.compare_digest(signature, _sign(user_id, payload)):
+            raise ValueError("assinatura inválida")
+        created_at, _, job_id = payload.decode().partition("|")
+        return datetime.fromisoformat(created_at), job_id
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido"
+        )
@@ -0,0 +1,158 @@
+"""
+Helpers compartilhados pelas rotas da API.
+"""
+
+from typing import Any, Dict, NoReturn
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.orm import undefer_group
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.errors import JobNotFoundError, JobAccessDeniedError, TranscriptionNotCompletedError
+from app.core.auth import get_current_user_id
+from app.core.database import JOB_CONTENT_GROUP, get_db, User, Job
+
+
+async def load_job_for_user(
+    db: AsyncSession,
+    job_id: str,
+    user_id: int,
+    *columns: Any,
+    require_completed: bool = False
+) -> Any:
+    """
+    Carrega um job verificando, na mesma query, que ele pertence ao usuário
+    e que o usuário existe e está ativo.
+
+    Args:
+        db: Sessão assíncrona do banco
+        job_id: ID do job
+        user_id: ID do usuário autenticado
+        *columns: Colunas de Job a selecionar (default: objeto Job completo,
+            incluindo as colunas adiadas, que não podem ser lazy-loaded em sessão async)
+        require_completed: Exige status COMPLETED (verificado no próprio WHERE)
+
+    Returns:
+        Objeto Job, ou Row com as colunas pedidas
+
+    Raises:
+        HTTPException 404: Se job não existir
+        HTTPException 403: Se job não pertencer ao usuário ou usuário inativo
+        HTTPException 401: Se usuário não existir
+        HTTPException 400: Se require_completed e a transcrição não estiver completa
+    """
+    query = (
+        select(*columns) if columns else select(Job).options(undefer_group(JOB_CONTENT_GROUP))
+    ).join(User, User.id == Job.user_id).where(
+        Job.id == job_id,
+        Job.user_id == user_id,
+        User.is_active.is_(True)
+    )
+    if require_completed:
+        query = query.where(Job.status == "COMPLETED")
+
+    result = await db.execute(query)
+    job = result.first() if columns else result.scalar_one_or_none()
+
+    if job is not None:
+        return job
+
+    await _raise_job_access_error(db, job_id, user_id)
+
+
+class OwnedJob:
+    """
+    Dependency que carrega um job do usuário autenticado (ver load_job_for_user).
+
+    Uso: `job = Depends(OwnedJob(Job.id, Job.status, require_completed=True))`.
+    O FastAPI reaproveita o resultado se a mesma instância for usada mais de
+    uma vez na mesma requisição.
+    """
+
+    def __init__(self, *columns: Any, require_completed: bool = False) -> None:
+        self.columns = columns
+        self.require_completed = require_completed
+
+    async def __call__(
+        self,
+        job_id: str,
+        user_id: int = Depends(get_current_user_id),
+        db: AsyncSession = Depends(get_db)
+    ) -> Any:
+        return await load_job_for_user(
+            db, job_id, user_id,
+            *self.columns,
+            require_completed=self.require_completed
+        )
+
+
+async def update_job_for_user(
+    db: AsyncSession,
+    job_id: str,
+    user_id: int,
+    values: Dict[str, Any],
+    *returning: Any
+) -> Any:
+    """
+    Atualiza um job em um único UPDATE ... RETURNING, com a verificação de
+    dono e de usuário ativo no próprio WHERE. Faz commit.
+
+    Args:
+        db: Sessão assíncrona do banco
+        job_id: ID do job
+        user_id: ID do usuário autenticado
+        values: Colunas a atualizar
+        *returning: Colunas de Job a retornar (default: Job.id)
+
+    Returns:
+        Row com as colunas de `returning`
+
+    Raises:
+        HTTPException 404/403/401: Como em load_job_for_user
+    """
+    active_user = select(User.id).where(User.id == user_id, User.is_active.is_(True)).exists()
+
+    result = await db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.user_id == user_id, active_user)
+        .values(**values)
+        .returning(*(returning or (Job.id,)))
+    )
+    row = result.first()
+
+    if row is None:
+        await db.rollback()
+        await _raise_job_access_error(db, job_id, user_id)
+
+    await db.commit()
+    return row
+
+
+async def _raise_job_access_error(db: AsyncSession, job_id: str, user_id: int) -> NoReturn:
+    """Descobre por que o job não foi encontrado para o usuário e lança o erro HTTP correspondente"""
+    job = (await db.execute(select(Job.user_id, Job.status).where(Job.id == job_id))).first()
+
+    if job is None:
+        raise JobNotFoundError()
+
+    if job.user_id != user_id:
+        raise JobAccessDeniedError()
+
+    is_active = await db.scalar(select(User.is_active).where(User.id == user_id))
+
+    if is_active is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuário não encontrado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    if not is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Usuário inativo"
+        )
+
+    # Dono e usuário válidos: só pode ter falhado o require_completed
+    raise TranscriptionNotCompletedError()
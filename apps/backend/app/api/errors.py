@@ -0,0 +1,39 @@
+"""
+Erros HTTP comuns às rotas da API.
+
+São subclasses de HTTPException com construtor sem argumentos, em vez de
+instâncias compartilhadas: relançar a mesma instância acumularia
+__traceback__/__context__ a cada requisição.
+"""
+
+from fastapi import HTTPException, status
+
+
+class JobNotFoundError(HTTPException):
+    """404 para job inexistente"""
+
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job não encontrado"
+        )
+
+
+class JobAccessDeniedError(HTTPException):
+    """403 para job de outro usuário"""
+
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado a este job"
+        )
+
+
+class TranscriptionNotCompletedError(HTTPException):
+    """400 para job cuja transcrição ainda não foi concluída"""
+
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Transcrição ainda não foi concluída"
+        )
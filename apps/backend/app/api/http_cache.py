@@ -0,0 +1,63 @@
+"""
+Helpers de cache HTTP (ETag / If-None-Match) para as rotas GET de jobs.
+
+O frontend faz polling dessas rotas; quando o conteúdo não mudou,
+respondemos 304 sem recarregar (OCI, JSON, substituição de nomes).
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response, status
+
+CACHE_CONTROL = "private, must-revalidate"
+
+
+def job_etag(job_id: str, updated_at: Optional[datetime], *extra: Any) -> str:
+    """
+    Gera um ETag fraco para o conteúdo de um job.
+
+    Args:
+        job_id: ID do job
+        updated_at: Última alteração do job (None para registros antigos)
+        *extra: Demais valores que alteram a representação (formato, nomes, etc.)
+
+    Returns:
+        ETag no formato W/"<hash>"
+    """
+    stamp = updated_at.timestamp() if updated_at else ""
+    raw = "-".join(str(part) for part in (job_id, stamp, *extra))
+    return f'W/"{hashlib.blake2s(raw.encode("utf-8")).hexdigest()}"'
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    """Headers de validação enviados junto com a resposta"""
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Verifica se o If-None-Match da requisição casa com o ETag atual
+    (comparação fraca, como manda a RFC 9110 para If-None-Match).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    current = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == current
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified_response(etag: str) -> Response:
+    """Resposta 304 sem corpo"""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=etag_headers(etag)
+    )
@@ -2,18 +2,22 @@
 Rotas de autenticação: registro, login e refresh de tokens.
 """
 
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
 from app.core.database import get_db, User
 from app.core.auth import (
     get_password_hash,
-    authenticate_user,
+    authenticate_user_cached,
     create_tokens_for_user,
     verify_refresh_token,
     create_access_token,
-    get_current_user
+    get_current_user,
+    CurrentUser
 )
 from app.models.schemas import (
     UserRegister,
@@ -26,8 +30,20 @@ from app.models.schemas import (
 router = APIRouter()
 
 
+def _duplicated_user_field(error: IntegrityError) -> str:
+    """
+    Identifica qual campo único (email ou username) causou o IntegrityError.
+
+    Usa o nome da constraint quando o driver o expõe (Postgres) e, caso
+    contrário, a mensagem do erro (SQLite: "UNIQUE constraint failed: users.username").
+    """
+    diag = getattr(error.orig, "diag", None)
+    constraint = getattr(diag, "constraint_name", None) or str(error.orig)
+    return "username" if "username" in constraint else "email"
+
+
 @router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, db: AsyncSession = Depends(get_db)):
     """
     Registra um novo usuário.
 
@@ -43,28 +59,8 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     """
     logger.info(f"Tentativa de registro: {user_data.email}")
 
-    # Verificar se email já existe
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
-    if existing_user:
-        logger.warning(f"Email já existe: {user_data.email}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email já está em uso"
-        )
-
-    # Verificar se username já existe
-    existing_username = db.query(User).filter(
-        User.username == user_data.username
-    ).first()
-    if existing_username:
-        logger.warning(f"Username já existe: {user_data.username}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username já está em uso"
-        )
-
-    # Criar novo usuário
-    hashed_password = get_password_hash(user_data.password)
+    # Criar novo usuário (unicidade de email/username garantida pelo banco)
+    hashed_password = await asyncio.to_thread(get_password_hash, user_data.password)
 
     new_user = User(
         email=user_data.email,
@@ -74,8 +70,22 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if _duplicated_user_field(e) == "username":
+            logger.warning(f"Username já existe: {user_data.username}")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Username já está em uso"
+            )
+        logger.warning(f"Email já existe: {user_data.email}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email já está em uso"
+        )
+    await db.refresh(new_user)
 
     logger.info(f"Usuário criado com sucesso: {new_user.email} (ID: {new_user.id})")
 
@@ -86,7 +96,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     """
     Autentica um usuário e retorna tokens.
 
@@ -103,7 +113,7 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     logger.info(f"Tentativa de login: {credentials.email}")
 
     # Autenticar usuário
-    user = authenticate_user(db, credentials.email, credentials.password)
+    user = await authenticate_user_cached(db, credentials.email, credentials.password)
 
     if not user:
         logger.warning(f"Falha no login: {credentials.email}")
@@ -124,7 +134,7 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
 @router.post("/refresh", response_model=TokenResponse)
 async def refresh_token(
     refresh_data: RefreshTokenRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Renova o access token usando um refresh token válido.
@@ -151,8 +161,9 @@ async def refresh_token(
             detail="Refresh token inválido"
         )
 
-    # Buscar usuário
-    user = db.query(User).filter(User.id == user_id).first()
+    # Buscar apenas o necessário para validar o usuário
+    result = await db.execute(select(User.id, User.is_active).where(User.id == user_id))
+    user = result.first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -165,10 +176,10 @@ async def refresh_token(
             detail="Usuário inativo"
         )
 
-    logger.info(f"Token renovado para usuário: {user.email}")
+    logger.info(f"Token renovado para usuário: {user.id}")
 
     # Criar novo access token
-    new_access_token = create_access_token(data={"sub": user.id})
+    new_access_token = create_access_token(data={"sub": str(user.id)})
 
     return TokenResponse(
         access_token=new_access_token,
@@ -178,7 +189,7 @@ async def refresh_token(
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: CurrentUser = Depends(get_current_user)):
     """
     Retorna informações do usuário autenticado.
 
@@ -188,4 +199,10 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
     Returns:
         Dados do usuário
     """
-    return UserResponse.from_orm(current_user)
+    return UserResponse(
+        id=current_user.id,
+        email=current_user.email,
+        username=current_user.username,
+        is_active=current_user.is_active,
+        created_at=current_user.created_at
+    )
@@ -2,21 +2,62 @@
 Rota de chat/RAG sobre transcrições.
 """
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
-import json
+from typing import Any, Dict, List, Optional, Tuple
 
-from app.core.database import get_db, User, Job
-from app.core.auth import get_current_user
+from app.core.database import get_db, Job
+from app.core.utils import apply_speaker_names, now
+from app.core.auth import get_current_user_id
+from app.api.deps import OwnedJob, load_job_for_user
 from app.services.embeddings import embeddings_service
 from app.services.azure_openai import azure_openai_service
-from app.models.schemas import ChatRequest, ChatResponse
+from app.models.schemas import ChatMessage, ChatRequest, ChatResponse
 
 router = APIRouter()
 
+# Sem os textos: só são necessários se o índice não existir
+chat_job = OwnedJob(Job.id, Job.filename, require_completed=True)
 
-def get_transcription_text_with_custom_names(job: Job) -> str:
+# Serializador do histórico, montado uma única vez (só os campos aceitos pela API do modelo)
+CHAT_HISTORY_ADAPTER = TypeAdapter(List[ChatMessage])
+CHAT_HISTORY_FIELDS = {"__all__": {"role", "content"}}
+
+# Tamanho máximo do trecho de cada fonte retornada na resposta do chat
+SOURCE_PREVIEW_CHARS = 200
+
+
+def build_sources(
+    search_results: List[Dict[str, Any]],
+    width: int = SOURCE_PREVIEW_CHARS
+) -> List[Dict[str, Any]]:
+    """
+    Monta a lista de fontes da resposta do chat a partir dos resultados do FAISS.
+
+    Cada trecho é truncado em `width` caracteres (com "..."); trechos menores
+    são reaproveitados sem cópia.
+    """
+    sources = []
+    append = sources.append
+
+    for result in search_results:
+        chunk = result["chunk"]
+        append({
+            "rank": result["rank"],
+            "text": chunk if len(chunk) <= width else f"{chunk[:width]}...",
+            "score": result["score"]
+        })
+
+    return sources
+
+
+def get_transcription_text_with_custom_names(job: Any) -> str:
     """
     Retorna o texto da transcrição com nomes customizados aplicados.
 
@@ -28,85 +69,48 @@ def get_transcription_text_with_custom_names(job: Job) -> str:
 
     # Aplicar nomes customizados de speakers se existirem
     if job.speaker_names:
-        try:
-            custom_names = json.loads(job.speaker_names)
-            logger.info(f"Aplicando nomes customizados ao contexto do chat: {custom_names}")
+        logger.debug("Aplicando nomes customizados ao contexto do chat: {}", job.speaker_names)
 
-            # Substituir "Speaker X" pelos nomes customizados
-            for speaker_id_str, custom_name in custom_names.items():
-                old_name = f"Speaker {speaker_id_str}"
-                text = text.replace(old_name, custom_name)
-                logger.debug(f"Substituído '{old_name}' por '{custom_name}' no contexto")
-        except json.JSONDecodeError:
-            logger.warning(f"Erro ao parsear speaker_names para job {job.id}")
+        # Substituir "Speaker X" pelos nomes customizados em uma única passada
+        text = apply_speaker_names(text, job.speaker_names)
 
     return text
 
 
-@router.post("/{job_id}", response_model=ChatResponse)
-async def chat_with_transcription(
+async def prepare_chat_context(
     job_id: str,
     chat_request: ChatRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+    job: Row,
+    user_id: int,
+    db: AsyncSession
+) -> Tuple[List[Dict[str, Any]], List[str], Optional[List[Dict[str, str]]]]:
     """
-    Faz uma pergunta sobre uma transcrição usando RAG (Retrieval Augmented Generation).
-
-    Fluxo:
-    1. Valida acesso ao job
-    2. Busca chunks relevantes no FAISS
-    3. Usa Azure OpenAI para gerar resposta baseada nos chunks
-
-    Args:
-        job_id: ID do job da transcrição
-        chat_request: Pergunta e histórico de chat (opcional)
-        current_user: Usuário autenticado
-        db: Sessão do banco
+    Etapas do chat anteriores à geração da resposta: garante o índice FAISS,
+    busca os chunks relevantes e prepara o histórico.
 
     Returns:
-        Resposta à pergunta com fontes (chunks usados)
+        Tuple: (resultados da busca, textos dos chunks, histórico para o modelo)
 
     Raises:
-        HTTPException 404: Se job não existir
-        HTTPException 403: Se usuário não tiver acesso
-        HTTPException 400: Se transcrição não estiver disponível
+        HTTPException 404: Se nenhum contexto relevante for encontrado
+        HTTPException 500: Se a indexação ou a busca falhar
     """
-    logger.info(f"Chat request para job {job_id}: {chat_request.question[:100]}...")
-
-    # 1. Buscar e validar job
-    job = db.query(Job).filter(Job.id == job_id).first()
-
-    if not job:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Job não encontrado"
-        )
-
-    # Verificar permissão
-    if job.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado a este job"
-        )
-
-    # Verificar se está completo
-    if job.status != "COMPLETED":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Transcrição não disponível. Status: {job.status}"
-        )
-
-    # 2. Obter texto da transcrição com nomes customizados aplicados
-    transcription_text = get_transcription_text_with_custom_names(job)
-
-    # 3. Verificar se índice FAISS existe
+    # 1. Job já validado pela dependency (acesso e status)
+    # 2. Verificar se índice FAISS existe
     if not embeddings_service.index_exists(job_id):
         logger.warning(f"Índice FAISS não existe para job {job_id}, criando...")
 
+        # 3. Obter texto da transcrição com nomes customizados aplicados
+        texts = await load_job_for_user(
+            db, job_id, user_id,
+            Job.id, Job.transcription_text, Job.edited_transcription, Job.speaker_names
+        )
+        transcription_text = get_transcription_text_with_custom_names(texts)
+
         # Criar índice se não existir (fallback)
         try:
-            embeddings_service.create_index_for_job(
+            await run_in_threadpool(
+                embeddings_service.create_index_for_job,
                 job_id=job_id,
                 text=transcription_text,
                 metadata={"filename": job.filename}
@@ -120,7 +124,8 @@ async def chat_with_transcription(
 
     # 4. Buscar chunks relevantes
     try:
-        search_results = embeddings_service.search(
+        search_results = await run_in_threadpool(
+            embeddings_service.search,
             job_id=job_id,
             query=chat_request.question,
             top_k=5  # Top 5 chunks mais relevantes
@@ -147,14 +152,56 @@ async def chat_with_transcription(
     # 5. Preparar histórico de chat (se houver)
     chat_history = None
     if chat_request.chat_history:
-        chat_history = [
-            {"role": msg.role, "content": msg.content}
-            for msg in chat_request.chat_history
-        ]
+        chat_history = CHAT_HISTORY_ADAPTER.dump_python(
+            chat_request.chat_history,
+            include=CHAT_HISTORY_FIELDS
+        )
+
+    return search_results, context_chunks, chat_history
+
+
+@router.post("/{job_id}", response_model=ChatResponse)
+async def chat_with_transcription(
+    job_id: str,
+    chat_request: ChatRequest,
+    job: Row = Depends(chat_job),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Faz uma pergunta sobre uma transcrição usando RAG (Retrieval Augmented Generation).
+
+    Fluxo:
+    1. Valida acesso ao job
+    2. Busca chunks relevantes no FAISS
+    3. Usa Azure OpenAI para gerar resposta baseada nos chunks
+
+    Args:
+        job_id: ID do job da transcrição
+        chat_request: Pergunta e histórico de chat (opcional)
+        job: Job do usuário, com a transcrição concluída
+        user_id: ID do usuário autenticado
+        db: Sessão do banco
+
+    Returns:
+        Resposta à pergunta com fontes (chunks usados)
+
+    Raises:
+        HTTPException 404: Se job não existir
+        HTTPException 403: Se usuário não tiver acesso
+        HTTPException 400: Se transcrição não estiver disponível
+    """
+    logger.info(f"Chat request para job {job_id}: {chat_request.question[:100]}...")
+
+    # 1-5. Índice FAISS, busca dos chunks relevantes e histórico
+    search_results, context_chunks, chat_history = await prepare_chat_context(
+        job_id, chat_request, job, user_id, db
+    )
 
     # 6. Gerar resposta com Azure OpenAI
     try:
-        answer = azure_openai_service.answer_question(
+        answer = await run_in_threadpool(
+            azure_openai_service.answer_question,
             question=chat_request.question,
             context_chunks=context_chunks,
             chat_history=chat_history,
@@ -172,17 +219,89 @@ async def chat_with_transcription(
         )
 
     # 7. Preparar fontes (chunks usados)
-    sources = [
-        {
-            "rank": result["rank"],
-            "text": result["chunk"][:200] + "..." if len(result["chunk"]) > 200 else result["chunk"],
-            "score": result["score"]
-        }
-        for result in search_results
-    ]
+    sources = build_sources(search_results)
 
     return ChatResponse(
         answer=answer,
         sources=sources,
         job_id=job_id
     )
+
+
+@router.post("/{job_id}/stream")
+async def chat_with_transcription_stream(
+    job_id: str,
+    chat_request: ChatRequest,
+    job: Row = Depends(chat_job),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Versão em streaming (SSE) do chat: a resposta chega em trechos, à medida
+    que o modelo gera, em vez de só depois da geração completa.
+
+    Eventos (data: JSON):
+    - {"event": "sources", "sources": [...]}: fontes usadas, antes da resposta
+    - {"event": "token", "content": "..."}: trecho da resposta
+    - {"event": "done", "timestamp": "..."}: fim da resposta
+    - {"event": "error", "detail": "..."}: falha no meio da geração
+
+    Args:
+        job_id: ID do job da transcrição
+        chat_request: Pergunta e histórico de chat (opcional)
+        job: Job do usuário, com a transcrição concluída
+        user_id: ID do usuário autenticado
+        db: Sessão do banco
+
+    Returns:
+        Stream text/event-stream
+
+    Raises:
+        HTTPException 404: Se job não existir
+        HTTPException 403: Se usuário não tiver acesso
+        HTTPException 400: Se transcrição não estiver disponível
+    """
+    logger.info(f"Chat (stream) request para job {job_id}: {chat_request.question[:100]}...")
+
+    search_results, context_chunks, chat_history = await prepare_chat_context(
+        job_id, chat_request, job, user_id, db
+    )
+    # Devolver a conexão ao pool: a sessão não é usada durante o stream
+    await db.close()
+
+    # Abrir a geração antes do stream (falhas de conexão ainda como 500)
+    try:
+        deltas = await run_in_threadpool(
+            azure_openai_service.answer_question_stream,
+            question=chat_request.question,
+            context_chunks=context_chunks,
+            chat_history=chat_history,
+            max_tokens=300,
+            temperature=0.7
+        )
+    except Exception as e:
+        logger.error(f"Erro ao gerar resposta: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro ao gerar resposta"
+        )
+
+    sources = build_sources(search_results)
+
+    # Gerador síncrono: o StreamingResponse consome cada trecho no threadpool
+    def event_stream():
+        yield b"data: " + orjson.dumps({"event": "sources", "sources": sources}) + b"\n\n"
+        try:
+            for content in deltas:
+                yield b"data: " + orjson.dumps({"event": "token", "content": content}) + b"\n\n"
+        except Exception as e:
+            logger.error(f"Erro durante o stream da resposta: {str(e)}")
+            yield b"data: " + orjson.dumps({"event": "error", "detail": "Erro ao gerar resposta"}) + b"\n\n"
+            return
+        yield b"data: " + orjson.dumps({"event": "done", "timestamp": now()}) + b"\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
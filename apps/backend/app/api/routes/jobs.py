@@ -2,55 +2,48 @@
 Rotas para consultar status e informações de jobs.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.engine import Row
 from loguru import logger
 
-from app.core.database import get_db, User, Job
-from app.core.auth import get_current_user
+from app.core.database import Job
+from app.api.deps import OwnedJob
 from app.models.schemas import JobStatus
 
 router = APIRouter()
 
+# Apenas as colunas do status (evita carregar textos/JSONs grandes)
+status_job = OwnedJob(
+    Job.id,
+    Job.status,
+    Job.progress,
+    Job.created_at,
+    Job.started_at,
+    Job.completed_at,
+    Job.error_message
+)
+
 
 @router.get("/{job_id}/status", response_model=JobStatus)
 async def get_job_status(
     job_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    job: Row = Depends(status_job)
 ):
     """
     Obtém o status atual de um job de transcrição.
 
     Args:
         job_id: ID do job
-        current_user: Usuário autenticado
-        db: Sessão do banco
+        job: Job do usuário autenticado
 
     Returns:
-        Status do job (QUEUED, PROCESSING, COMPLETED, FAILED)
+        Status do job (UPLOADING, QUEUED, PROCESSING, COMPLETED, FAILED)
 
     Raises:
         HTTPException 404: Se job não existir
         HTTPException 403: Se job não pertencer ao usuário
     """
-    # Buscar job
-    job = db.query(Job).filter(Job.id == job_id).first()
-
-    if not job:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Job não encontrado"
-        )
-
-    # Verificar se o job pertence ao usuário
-    if job.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado a este job"
-        )
-
-    return JobStatus(
+    job_status = JobStatus(
         job_id=job.id,
         status=job.status,
         progress=job.progress,
@@ -59,3 +52,6 @@ async def get_job_status(
         completed_at=job.completed_at,
         error_message=job.error_message
     )
+
+    # Rota de polling: serializar direto, sem revalidar pelo response_model
+    return Response(content=job_status.to_json_bytes(), media_type="application/json")
@@ -2,14 +2,24 @@
 Rota para geração de atas de reunião de transcrições.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from datetime import timedelta
+from sqlalchemy import or_, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
 from loguru import logger
-import json
-
-from app.core.database import get_db, User, Job
-from app.core.auth import get_current_user
+import os
+import tempfile
+
+from app.core.database import get_db, Job
+from app.core.auth import get_current_user_id
+from app.core.config import settings
+from app.core.utils import now
+from app.api.deps import OwnedJob, update_job_for_user
+from app.api.http_cache import job_etag, etag_headers, is_not_modified, not_modified_response
 from app.workers.tasks import generate_meeting_minutes_task
 from app.models.schemas import (
     MeetingMinutesResponse,
@@ -20,51 +30,39 @@ from app.services.azure_openai import azure_openai_service
 
 router = APIRouter()
 
+# Colunas carregadas pelas rotas (sem o texto da transcrição)
+minutes_job = OwnedJob(Job.id, Job.meeting_minutes, Job.updated_at, require_completed=True)
+minutes_docx_job = OwnedJob(Job.id, Job.filename, Job.meeting_minutes, require_completed=True)
+
+# Documentos maiores que isso são gravados em disco em vez de ficar em memória
+DOCX_SPOOL_MAX_SIZE = 1 << 20  # 1 MB
+DOCX_STREAM_CHUNK_SIZE = 64 * 1024
+
 
 @router.get("/{job_id}", response_model=MeetingMinutesResponse)
 async def get_meeting_minutes(
     job_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    job: Row = Depends(minutes_job)
 ):
     """
     Obtém a ata de reunião de uma transcrição (se já foi gerada).
 
     Args:
         job_id: ID do job
-        current_user: Usuário autenticado
-        db: Sessão do banco
+        request: Requisição HTTP (If-None-Match)
+        response: Resposta (recebe os headers ETag/Cache-Control)
+        job: Job do usuário, com a transcrição concluída
 
     Returns:
-        Ata de reunião da transcrição
+        Ata de reunião da transcrição (304 se não mudou desde o If-None-Match)
 
     Raises:
         HTTPException 404: Se job não existir ou ata não foi gerada
         HTTPException 403: Se usuário não tiver acesso
+        HTTPException 400: Se transcrição não estiver completa
     """
-    # Buscar job
-    job = db.query(Job).filter(Job.id == job_id).first()
-
-    if not job:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Job não encontrado"
-        )
-
-    # Verificar permissão
-    if job.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado"
-        )
-
-    # Verificar se transcrição está completa
-    if job.status != "COMPLETED":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Transcrição ainda não foi concluída"
-        )
-
     # Verificar se ata existe
     if not job.meeting_minutes:
         raise HTTPException(
@@ -72,12 +70,15 @@ async def get_meeting_minutes(
             detail="Ata ainda não foi gerada. Use POST /v1/meeting-minutes/{job_id} para gerar."
         )
 
-    # Parse JSON
-    minutes_data = json.loads(job.meeting_minutes)
+    # Conteúdo inalterado desde o último poll do cliente
+    etag = job_etag(job.id, job.updated_at)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers.update(etag_headers(etag))
 
     return MeetingMinutesResponse(
         job_id=job.id,
-        meeting_minutes=MeetingMinutesData(**minutes_data),
+        meeting_minutes=MeetingMinutesData(**job.meeting_minutes),
         cached=True
     )
 
@@ -86,8 +87,8 @@ async def get_meeting_minutes(
 async def generate_meeting_minutes(
     job_id: str,
     request: GenerateMeetingMinutesRequest = GenerateMeetingMinutesRequest(),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    job: Row = Depends(minutes_job),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Gera (ou regenera) uma ata de reunião para uma transcrição.
@@ -98,7 +99,7 @@ async def generate_meeting_minutes(
     Args:
         job_id: ID do job
         request: Parâmetros de geração (opcional)
-        current_user: Usuário autenticado
+        job: Job do usuário, com a transcrição concluída
         db: Sessão do banco
 
     Returns:
@@ -111,68 +112,74 @@ async def generate_meeting_minutes(
     """
     logger.info(f"Solicitação de ata de reunião para job {job_id}")
 
-    # Buscar job
-    job = db.query(Job).filter(Job.id == job_id).first()
-
-    if not job:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Job não encontrado"
-        )
-
-    # Verificar permissão
-    if job.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado"
-        )
-
-    # Verificar se transcrição está completa
-    if job.status != "COMPLETED":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Transcrição ainda não foi concluída"
-        )
-
     # Verificar se já tem ata
     if job.meeting_minutes:
         logger.info(f"Ata já existe para job {job_id}, retornando cached")
-        minutes_data = json.loads(job.meeting_minutes)
         return MeetingMinutesResponse(
             job_id=job.id,
-            meeting_minutes=MeetingMinutesData(**minutes_data),
+            meeting_minutes=MeetingMinutesData(**job.meeting_minutes),
             cached=True
         )
 
-    # Enfileirar task de geração de ata
-    try:
-        generate_meeting_minutes_task.delay(
-            job_id=job_id,
-            max_tokens=request.max_tokens,
-            temperature=request.temperature
-        )
-
-        logger.info(f"Task de ata de reunião enfileirada para job {job_id}")
-
-        # Retornar resposta indicando que está sendo gerada
-        # Criar estrutura vazia temporária
-        temp_minutes = MeetingMinutesData(
+    # Retornar resposta indicando que está sendo gerada
+    # Criar estrutura vazia temporária
+    temp_response = MeetingMinutesResponse(
+        job_id=job.id,
+        meeting_minutes=MeetingMinutesData(
             title="Gerando...",
             summary="Ata de reunião sendo gerada... Use GET para verificar quando estiver pronta.",
             topics=[],
             action_items=[],
             decisions=[],
             next_steps=[]
+        ),
+        cached=False
+    )
+
+    # Marcar como em geração de forma atômica: só a primeira requisição enfileira.
+    # Uma marcação mais antiga que o time limit das tasks é de uma task perdida
+    # (worker morto/reiniciado) e pode ser retomada
+    claimed_at = now()
+    claim = await db.execute(
+        update(Job)
+        .where(
+            Job.id == job_id,
+            or_(
+                Job.meeting_minutes_status.is_(None),
+                Job.meeting_minutes_claimed_at.is_(None),
+                Job.meeting_minutes_claimed_at < claimed_at - timedelta(seconds=settings.CELERY_TASK_TIME_LIMIT)
+            )
         )
+        .values(meeting_minutes_status="GENERATING", meeting_minutes_claimed_at=claimed_at)
+    )
+    await db.commit()
 
-        return MeetingMinutesResponse(
-            job_id=job.id,
-            meeting_minutes=temp_minutes,
-            cached=False
+    if claim.rowcount == 0:
+        logger.info(f"Ata já está sendo gerada para job {job_id}")
+        return temp_response
+
+    # Enfileirar task de geração de ata (publish no broker fora do event loop)
+    try:
+        await run_in_threadpool(
+            generate_meeting_minutes_task.apply_async,
+            kwargs={
+                "job_id": job_id,
+                "max_tokens": request.max_tokens,
+                "temperature": request.temperature
+            },
+            ignore_result=True
         )
 
+        logger.info(f"Task de ata de reunião enfileirada para job {job_id}")
+
+        return temp_response
+
     except Exception as e:
         logger.error(f"Erro ao enfileirar task de ata: {str(e)}")
+        await db.execute(
+            update(Job).where(Job.id == job_id).values(meeting_minutes_status=None)
+        )
+        await db.commit()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro ao gerar ata de reunião"
@@ -182,15 +189,15 @@ async def generate_meeting_minutes(
 @router.delete("/{job_id}")
 async def delete_meeting_minutes(
     job_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Deleta a ata de reunião de um job (para forçar regeneração).
 
     Args:
         job_id: ID do job
-        current_user: Usuário autenticado
+        user_id: ID do usuário autenticado
         db: Sessão do banco
 
     Returns:
@@ -200,25 +207,11 @@ async def delete_meeting_minutes(
         HTTPException 404: Se job não existir
         HTTPException 403: Se usuário não tiver acesso
     """
-    # Buscar job
-    job = db.query(Job).filter(Job.id == job_id).first()
-
-    if not job:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Job não encontrado"
-        )
-
-    # Verificar permissão
-    if job.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado"
-        )
-
-    # Deletar ata
-    job.meeting_minutes = None
-    db.commit()
+    # Deletar ata (verificação de acesso no próprio UPDATE)
+    await update_job_for_user(
+        db, job_id, user_id,
+        {"meeting_minutes": None, "meeting_minutes_status": None}
+    )
 
     logger.info(f"Ata de reunião deletada para job {job_id}")
 
@@ -228,16 +221,14 @@ async def delete_meeting_minutes(
 @router.get("/{job_id}/download")
 async def download_meeting_minutes_docx(
     job_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    job: Row = Depends(minutes_docx_job)
 ):
     """
     Faz download da ata de reunião em formato .docx formatado.
 
     Args:
         job_id: ID do job
-        current_user: Usuário autenticado
-        db: Sessão do banco
+        job: Job do usuário, com a transcrição concluída
 
     Returns:
         Arquivo .docx com a ata formatada
@@ -245,30 +236,8 @@ async def download_meeting_minutes_docx(
     Raises:
         HTTPException 404: Se job não existir ou ata não foi gerada
         HTTPException 403: Se usuário não tiver acesso
+        HTTPException 400: Se transcrição não estiver completa
     """
-    # Buscar job
-    job = db.query(Job).filter(Job.id == job_id).first()
-
-    if not job:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Job não encontrado"
-        )
-
-    # Verificar permissão
-    if job.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado"
-        )
-
-    # Verificar se transcrição está completa
-    if job.status != "COMPLETED":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Transcrição ainda não foi concluída"
-        )
-
     # Verificar se ata existe
     if not job.meeting_minutes:
         raise HTTPException(
@@ -276,32 +245,40 @@ async def download_meeting_minutes_docx(
             detail="Ata ainda não foi gerada. Use POST /v1/meeting-minutes/{job_id} para gerar."
         )
 
-    try:
-        # Parse JSON da ata
-        minutes_data = json.loads(job.meeting_minutes)
+    docx_file = tempfile.SpooledTemporaryFile(max_size=DOCX_SPOOL_MAX_SIZE)
 
-        # Gerar documento .docx
-        docx_buffer = azure_openai_service.generate_meeting_minutes_docx(
-            minutes_data=minutes_data,
-            filename=job.filename
+    try:
+        # Gerar documento .docx direto no arquivo temporário
+        await run_in_threadpool(
+            azure_openai_service.generate_meeting_minutes_docx,
+            minutes_data=job.meeting_minutes,
+            filename=job.filename,
+            output=docx_file
         )
 
+        docx_file.seek(0, os.SEEK_END)
+        docx_size = docx_file.tell()
+        docx_file.seek(0)
+
         # Nome do arquivo de saída
         safe_filename = job.filename.rsplit('.', 1)[0] if '.' in job.filename else job.filename
         output_filename = f"ata_{safe_filename}.docx"
 
         logger.info(f"Enviando ata .docx para job {job_id}")
 
-        # Retornar como download
+        # Retornar como download, em blocos; o arquivo é fechado após o envio
         return StreamingResponse(
-            docx_buffer,
+            iter(lambda: docx_file.read(DOCX_STREAM_CHUNK_SIZE), b""),
             media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
             headers={
-                "Content-Disposition": f"attachment; filename=\"{output_filename}\""
-            }
+                "Content-Disposition": f"attachment; filename=\"{output_filename}\"",
+                "Content-Length": str(docx_size)
+            },
+            background=BackgroundTask(docx_file.close)
         )
 
     except Exception as e:
+        docx_file.close()
         logger.error(f"Erro ao gerar .docx da ata para download: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -2,64 +2,52 @@
 Rota para geração de resumos de transcrições.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
-from app.core.database import get_db, User, Job
-from app.core.auth import get_current_user
+from app.core.database import get_db, Job
+from app.core.auth import get_current_user_id
+from app.api.deps import OwnedJob, update_job_for_user
+from app.api.http_cache import job_etag, etag_headers, is_not_modified, not_modified_response
 from app.workers.tasks import generate_summary_task
 from app.models.schemas import SummaryResponse, GenerateSummaryRequest
 from app.services.azure_openai import azure_openai_service
 
 router = APIRouter()
 
+# Colunas carregadas pelas rotas (sem o texto da transcrição)
+summary_job = OwnedJob(Job.id, Job.summary, Job.updated_at, require_completed=True)
+summary_docx_job = OwnedJob(Job.id, Job.filename, Job.summary, require_completed=True)
+
 
 @router.get("/{job_id}", response_model=SummaryResponse)
 async def get_summary(
     job_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    job: Row = Depends(summary_job)
 ):
     """
     Obtém o resumo de uma transcrição (se já foi gerado).
 
     Args:
         job_id: ID do job
-        current_user: Usuário autenticado
-        db: Sessão do banco
+        request: Requisição HTTP (If-None-Match)
+        response: Resposta (recebe os headers ETag/Cache-Control)
+        job: Job do usuário, com a transcrição concluída
 
     Returns:
-        Resumo da transcrição
+        Resumo da transcrição (304 se não mudou desde o If-None-Match)
 
     Raises:
         HTTPException 404: Se job não existir ou resumo não foi gerado
         HTTPException 403: Se usuário não tiver acesso
+        HTTPException 400: Se transcrição não estiver completa
     """
-    # Buscar job
-    job = db.query(Job).filter(Job.id == job_id).first()
-
-    if not job:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Job não encontrado"
-        )
-
-    # Verificar permissão
-    if job.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado"
-        )
-
-    # Verificar se transcrição está completa
-    if job.status != "COMPLETED":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Transcrição ainda não foi concluída"
-        )
-
     # Verificar se resumo existe
     if not job.summary:
         raise HTTPException(
@@ -67,6 +55,12 @@ async def get_summary(
             detail="Resumo ainda não foi gerado. Use POST /v1/summary/{job_id} para gerar."
         )
 
+    # Conteúdo inalterado desde o último poll do cliente
+    etag = job_etag(job.id, job.updated_at)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers.update(etag_headers(etag))
+
     return SummaryResponse(
         job_id=job.id,
         summary=job.summary,
@@ -78,8 +72,7 @@ async def get_summary(
 async def generate_summary(
     job_id: str,
     request: GenerateSummaryRequest = GenerateSummaryRequest(),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    job: Row = Depends(summary_job)
 ):
     """
     Gera (ou regenera) um resumo para uma transcrição.
@@ -90,8 +83,7 @@ async def generate_summary(
     Args:
         job_id: ID do job
         request: Parâmetros de geração (opcional)
-        current_user: Usuário autenticado
-        db: Sessão do banco
+        job: Job do usuário, com a transcrição concluída
 
     Returns:
         Resumo gerado (ou cached se já existia)
@@ -103,29 +95,6 @@ async def generate_summary(
     """
     logger.info(f"Solicitação de resumo para job {job_id}")
 
-    # Buscar job
-    job = db.query(Job).filter(Job.id == job_id).first()
-
-    if not job:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Job não encontrado"
-        )
-
-    # Verificar permissão
-    if job.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado"
-        )
-
-    # Verificar se transcrição está completa
-    if job.status != "COMPLETED":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Transcrição ainda não foi concluída"
-        )
-
     # Verificar se já tem resumo
     if job.summary:
         logger.info(f"Resumo já existe para job {job_id}, retornando cached")
@@ -137,7 +106,8 @@ async def generate_summary(
 
     # Enfileirar task de geração de resumo
     try:
-        generate_summary_task.delay(
+        await run_in_threadpool(
+            generate_summary_task.delay,
             job_id=job_id,
             max_tokens=request.max_tokens,
             temperature=request.temperature
@@ -163,15 +133,15 @@ async def generate_summary(
 @router.delete("/{job_id}")
 async def delete_summary(
     job_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Deleta o resumo de um job (para forçar regeneração).
 
     Args:
         job_id: ID do job
-        current_user: Usuário autenticado
+        user_id: ID do usuário autenticado
         db: Sessão do banco
 
     Returns:
@@ -181,25 +151,8 @@ async def delete_summary(
         HTTPException 404: Se job não existir
         HTTPException 403: Se usuário não tiver acesso
     """
-    # Buscar job
-    job = db.query(Job).filter(Job.id == job_id).first()
-
-    if not job:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Job não encontrado"
-        )
-
-    # Verificar permissão
-    if job.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado"
-        )
-
-    # Deletar resumo
-    job.summary = None
-    db.commit()
+    # Deletar resumo (verificação de acesso no próprio UPDATE)
+    await update_job_for_user(db, job_id, user_id, {"summary": None})
 
     logger.info(f"Resumo deletado para job {job_id}")
 
@@ -209,16 +162,14 @@ async def delete_summary(
 @router.get("/{job_id}/download")
 async def download_summary_docx(
     job_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    job: Row = Depends(summary_docx_job)
 ):
     """
     Faz download do resumo em formato .docx formatado.
 
     Args:
         job_id: ID do job
-        current_user: Usuário autenticado
-        db: Sessão do banco
+        job: Job do usuário, com a transcrição concluída
 
     Returns:
         Arquivo .docx com o resumo formatado
@@ -226,30 +177,8 @@ async def download_summary_docx(
     Raises:
         HTTPException 404: Se job não existir ou resumo não foi gerado
         HTTPException 403: Se usuário não tiver acesso
+        HTTPException 400: Se transcrição não estiver completa
     """
-    # Buscar job
-    job = db.query(Job).filter(Job.id == job_id).first()
-
-    if not job:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Job não encontrado"
-        )
-
-    # Verificar permissão
-    if job.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado"
-        )
-
-    # Verificar se transcrição está completa
-    if job.status != "COMPLETED":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Transcrição ainda não foi concluída"
-        )
-
     # Verificar se resumo existe
     if not job.summary:
         raise HTTPException(
@@ -259,7 +188,8 @@ async def download_summary_docx(
 
     try:
         # Gerar documento .docx
-        docx_buffer = azure_openai_service.generate_summary_docx(
+        docx_buffer = await run_in_threadpool(
+            azure_openai_service.generate_summary_docx,
             summary_text=job.summary,
             filename=job.filename
         )
@@ -2,17 +2,29 @@
 Rotas para acessar transcrições completas.
 """
 
-import json
-from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.responses import Response
-from sqlalchemy.orm import Session
+import asyncio
+from typing import Any, Optional, Tuple
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
-from app.core.database import get_db, User, Job
-from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.database import JOB_STATUSES, get_db, Job
+from app.core.redis import get_async_redis, result_cache_key
+from app.core.utils import apply_transcription_overlay, overlay_filename, overlay_version
+from app.core.auth import CurrentUser, get_current_user, get_current_user_id
+from app.api.cursor import decode_cursor, encode_cursor
+from app.api.deps import OwnedJob, load_job_for_user, update_job_for_user
+from app.api.http_cache import job_etag, etag_headers, is_not_modified, not_modified_response
 from app.services.storage_oci import oci_storage_service
-from app.services.embeddings import embeddings_service
+from app.services.job_events import job_events_service
+from app.workers.tasks import materialize_overlay_task, rebuild_faiss_index_task
 from app.models.schemas import (
     TranscriptionResponse,
     TranscriptionPhrase,
@@ -21,66 +33,170 @@ from app.models.schemas import (
     TranscriptionListResponse,
     UpdateSpeakerNamesRequest,
     UpdateTranscriptionRequest,
-    UpdateTranscriptionResponse
+    UpdateTranscriptionResponse,
+    ensure_timezone
 )
 
 router = APIRouter()
 
+# Colunas do download (sem o texto da transcrição, resumo e ata)
+download_job = OwnedJob(
+    Job.id,
+    Job.filename,
+    Job.updated_at,
+    Job.edited_transcription,
+    Job.speaker_names,
+    Job.overlay_version,
+    require_completed=True
+)
+
+
+async def _read_result_file(job_id: str, filename: str) -> Tuple[bytes, bool]:
+    """Lê um arquivo de resultado do cache ou do OCI: (conteúdo, veio do cache)"""
+    cache_key = result_cache_key(job_id, filename)
+
+    try:
+        cached = await get_async_redis().get(cache_key)
+        if cached is not None:
+            return cached, True
+    except Exception as e:
+        logger.warning(f"Erro ao ler cache de resultado {cache_key}: {str(e)}")
+
+    result_path = oci_storage_service.generate_result_path(job_id, filename)
+    content = await asyncio.to_thread(oci_storage_service.download_file, result_path)
+    return content, False
+
+
+async def _cache_result_file(job_id: str, filename: str, content: bytes) -> None:
+    """Grava um arquivo de resultado no cache do Redis (falhas só são logadas)"""
+    cache_key = result_cache_key(job_id, filename)
+
+    try:
+        await get_async_redis().setex(cache_key, settings.RESULT_CACHE_TTL_SECONDS, content)
+    except Exception as e:
+        logger.warning(f"Erro ao gravar cache de resultado {cache_key}: {str(e)}")
+
+
+async def download_result_file(job_id: str, filename: str) -> bytes:
+    """
+    Baixa um arquivo de resultado do job do OCI, com cache no Redis.
+
+    Os resultados no OCI não mudam após a conclusão do job (edições e nomes
+    de speakers geram um novo transcription.overlayed.{versão}.json), então o
+    conteúdo pode ser cacheado sem invalidação. Falhas do Redis só
+    desativam o cache.
+
+    Args:
+        job_id: ID do job
+        filename: Nome do arquivo de resultado (ex.: transcription.json)
+
+    Returns:
+        Conteúdo do arquivo
+    """
+    content, cached = await _read_result_file(job_id, filename)
+    if not cached:
+        await _cache_result_file(job_id, filename, content)
+    return content
+
+
+def _discard_task(task: Optional["asyncio.Future[Any]"]) -> None:
+    """Cancela um download antecipado que não será usado (sem deixar exceção pendente)"""
+    if task is None:
+        return
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+async def _enqueue_materialize_overlay(job_id: str) -> None:
+    """Enfileira a geração do JSON com as alterações do usuário (falhas só são logadas)"""
+    try:
+        await run_in_threadpool(materialize_overlay_task.delay, job_id)
+    except Exception as e:
+        # As rotas de leitura aplicam as alterações por requisição enquanto isso
+        logger.error(f"Erro ao enfileirar materialização da transcrição: {str(e)}")
+
 
 @router.get("/{job_id}", response_model=TranscriptionResponse)
 async def get_transcription(
     job_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    http_request: Request,
+    response: Response,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Obtém a transcrição completa de um job.
 
     Args:
         job_id: ID do job
-        current_user: Usuário autenticado
+        http_request: Requisição HTTP (If-None-Match)
+        response: Resposta (recebe os headers ETag/Cache-Control)
+        user_id: ID do usuário autenticado
         db: Sessão do banco
 
     Returns:
-        Transcrição completa com diarização e timestamps
+        Transcrição completa com diarização e timestamps (304 se não mudou)
 
     Raises:
         HTTPException 404: Se job não existir
         HTTPException 403: Se job não pertencer ao usuário
         HTTPException 400: Se transcrição não estiver completa
     """
-    # Buscar job
-    job = db.query(Job).filter(Job.id == job_id).first()
+    # Sem If-None-Match a resposta quase certamente terá corpo: como o caminho
+    # do JSON depende só do job_id, o download começa junto com a consulta ao banco.
+    # O prefetch não grava no cache: só depois de o acesso ser confirmado
+    prefetch = None
+    if "if-none-match" not in http_request.headers:
+        prefetch = asyncio.ensure_future(_read_result_file(job_id, "transcription.json"))
 
-    if not job:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Job não encontrado"
+    try:
+        # Buscar apenas as colunas necessárias (sem o texto da transcrição, resumo e ata)
+        job = await load_job_for_user(
+            db, job_id, user_id,
+            Job.id,
+            Job.filename,
+            Job.status,
+            Job.edited_transcription,
+            Job.speaker_names,
+            Job.created_at,
+            Job.completed_at,
+            Job.updated_at,
+            Job.overlay_version,
+            require_completed=True
         )
 
-    # Verificar permissão
-    if job.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado a este job"
+        # Conteúdo inalterado desde o último poll: evita o download do OCI
+        etag = job_etag(
+            job.id,
+            job.updated_at,
+            len(job.edited_transcription or ""),
+            job.speaker_names or ""
         )
+        if is_not_modified(http_request, etag):
+            _discard_task(prefetch)
+            return not_modified_response(etag)
+    except BaseException:
+        _discard_task(prefetch)
+        raise
 
-    # Verificar se está completo
-    if job.status != "COMPLETED":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Transcrição não disponível. Status: {job.status}"
-        )
+    response.headers.update(etag_headers(etag))
 
-    # Baixar JSON do OCI
-    try:
-        result_path = oci_storage_service.generate_result_path(
-            job_id,
-            "transcription.json"
-        )
+    # Alterações do usuário já aplicadas por materialize_overlay_task?
+    version = overlay_version(job.edited_transcription, job.speaker_names)
+    materialized = version is not None and version == job.overlay_version
 
-        content = oci_storage_service.download_file(result_path)
-        transcription_data = json.loads(content.decode("utf-8"))
+    # Baixar JSON do OCI (ou do cache)
+    try:
+        if materialized:
+            _discard_task(prefetch)
+            content = await download_result_file(job_id, overlay_filename(version))
+        elif prefetch is not None:
+            content, cached = await prefetch
+            if not cached:
+                await _cache_result_file(job_id, "transcription.json", content)
+        else:
+            content = await download_result_file(job_id, "transcription.json")
+        transcription_data = orjson.loads(content)
 
     except Exception as e:
         logger.error(f"Erro ao baixar transcrição: {str(e)}")
@@ -89,52 +205,29 @@ async def get_transcription(
             detail="Erro ao carregar transcrição"
         )
 
-    # Parsear para schema
-    phrases = [
-        TranscriptionPhrase(**phrase)
-        for phrase in transcription_data.get("phrases", [])
-    ]
-
-    speakers = [
-        TranscriptionSpeaker(**speaker)
-        for speaker in transcription_data.get("speakers", [])
-    ]
-
-    # Usar texto editado se existir, caso contrário usar o original
-    full_text = job.edited_transcription if job.edited_transcription else transcription_data.get("full_text", "")
-
-    # Aplicar nomes customizados de speakers se existirem
-    if job.speaker_names:
-        try:
-            custom_names = json.loads(job.speaker_names)
-            logger.info(f"Aplicando nomes customizados: {custom_names}")
-            logger.info(f"Speakers antes da modificação: {[{'id': s.speaker_id, 'texts': s.texts} for s in speakers]}")
-
-            # Atualizar textos dos speakers com nomes customizados
-            for speaker in speakers:
-                speaker_id_str = str(speaker.speaker_id)
-                if speaker_id_str in custom_names:
-                    # Atualizar os textos para usar o nome customizado
-                    custom_name = custom_names[speaker_id_str]
-                    logger.info(f"Substituindo 'Speaker {speaker.speaker_id}' por '{custom_name}' nos textos do speaker {speaker.speaker_id}")
-                    speaker.texts = [
-                        text.replace(f"Speaker {speaker.speaker_id}", custom_name)
-                        for text in speaker.texts
-                    ]
-                    logger.info(f"Textos após substituição: {speaker.texts}")
-
-            # Atualizar também o full_text com os nomes customizados
-            for speaker_id_str, custom_name in custom_names.items():
-                speaker_id = speaker_id_str
-                old_name = f"Speaker {speaker_id}"
-                logger.info(f"Substituindo '{old_name}' por '{custom_name}' no full_text")
-                full_text = full_text.replace(old_name, custom_name)
-
-            logger.info(f"Speakers após modificação: {[{'id': s.speaker_id, 'texts': s.texts} for s in speakers]}")
-        except json.JSONDecodeError:
-            logger.warning(f"Erro ao parsear speaker_names para job {job_id}")
-
-    return TranscriptionResponse(
+    # Parsear para schema. O JSON é gerado pelo nosso worker: com TRUSTED_INTERNAL_JSON
+    # os modelos são montados sem validação e a resposta é serializada aqui mesmo
+    # (o response_model revalidaria cada frase a partir de um dict)
+    trusted = settings.TRUSTED_INTERNAL_JSON
+    build_phrase = TranscriptionPhrase.model_construct if trusted else TranscriptionPhrase
+    phrases = [build_phrase(**phrase) for phrase in transcription_data.get("phrases", [])]
+
+    # Aplicar texto editado e nomes customizados de speakers (se ainda não materializados)
+    if materialized:
+        full_text = transcription_data.get("full_text", "")
+        speaker_dicts = transcription_data.get("speakers", [])
+    else:
+        full_text, speaker_dicts = apply_transcription_overlay(
+            transcription_data,
+            job.edited_transcription,
+            job.speaker_names
+        )
+
+    build_speaker = TranscriptionSpeaker.model_construct if trusted else TranscriptionSpeaker
+    speakers = [build_speaker(**speaker) for speaker in speaker_dicts]
+
+    build_response = TranscriptionResponse.model_construct if trusted else TranscriptionResponse
+    transcription = build_response(
         job_id=job.id,
         filename=job.filename,
         status=job.status,
@@ -142,26 +235,36 @@ async def get_transcription(
         duration_seconds=transcription_data.get("duration_seconds", 0.0),
         phrases=phrases,
         speakers=speakers,
-        created_at=job.created_at,
-        completed_at=job.completed_at
+        # model_construct não passa pelo validador que adiciona o timezone
+        created_at=ensure_timezone(job.created_at),
+        completed_at=ensure_timezone(job.completed_at)
+    )
+
+    if not trusted:
+        return transcription
+
+    return Response(
+        content=transcription.to_json_bytes(),
+        media_type="application/json",
+        headers=etag_headers(etag)
     )
 
 
 @router.get("/{job_id}/download")
 async def download_transcription(
     job_id: str,
+    http_request: Request,
     format: str = Query(default="txt", regex="^(txt|json)$"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    job: Row = Depends(download_job)
 ):
     """
     Download da transcrição em formato TXT ou JSON.
 
     Args:
         job_id: ID do job
+        http_request: Requisição HTTP (If-None-Match)
         format: Formato do arquivo (txt ou json)
-        current_user: Usuário autenticado
-        db: Sessão do banco
+        job: Job do usuário, com a transcrição concluída
 
     Returns:
         Arquivo para download
@@ -169,65 +272,46 @@ async def download_transcription(
     Raises:
         HTTPException 404: Se job não existir
         HTTPException 403: Se job não pertencer ao usuário
+        HTTPException 400: Se transcrição não estiver completa
     """
-    # Buscar job
-    job = db.query(Job).filter(Job.id == job_id).first()
+    etag = job_etag(
+        job.id,
+        job.updated_at,
+        format,
+        len(job.edited_transcription or ""),
+        job.speaker_names or ""
+    )
+    if is_not_modified(http_request, etag):
+        return not_modified_response(etag)
 
-    if not job:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Job não encontrado"
-        )
+    version = overlay_version(job.edited_transcription, job.speaker_names)
 
-    # Verificar permissão
-    if job.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado"
-        )
+    try:
+        if format == "txt" and job.edited_transcription:
+            # Texto editado: não é preciso baixar o original
+            content = job.edited_transcription.encode("utf-8")
 
-    if job.status != "COMPLETED":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Transcrição não disponível"
-        )
+        elif format == "json" and version is not None and version == job.overlay_version:
+            # Alterações já aplicadas por materialize_overlay_task
+            content = await download_result_file(job_id, overlay_filename(version))
 
-    # Baixar arquivo do OCI
-    try:
-        filename = f"transcription.{format}"
-        result_path = oci_storage_service.generate_result_path(job_id, filename)
+        elif format == "json" and version is not None:
+            # Aplicar texto editado e nomes customizados sobre o JSON original
+            content = await download_result_file(job_id, "transcription.json")
+            transcription_data = orjson.loads(content)
 
-        content = oci_storage_service.download_file(result_path)
+            transcription_data["full_text"], transcription_data["speakers"] = apply_transcription_overlay(
+                transcription_data,
+                job.edited_transcription,
+                job.speaker_names
+            )
 
-        # Se houver texto editado e formato for TXT, usar o editado
-        if format == "txt" and job.edited_transcription:
-            content = job.edited_transcription.encode("utf-8")
+            # Mesma formatação do arquivo original salvo pelo worker
+            content = orjson.dumps(transcription_data, option=orjson.OPT_INDENT_2)
 
-        # Se houver nomes customizados de speakers e formato for JSON, aplicar as alterações
-        if format == "json" and (job.speaker_names or job.edited_transcription):
-            transcription_data = json.loads(content.decode("utf-8"))
-
-            # Aplicar texto editado
-            if job.edited_transcription:
-                transcription_data["full_text"] = job.edited_transcription
-
-            # Aplicar nomes customizados
-            if job.speaker_names:
-                try:
-                    custom_names = json.loads(job.speaker_names)
-                    # Atualizar speakers
-                    for speaker in transcription_data.get("speakers", []):
-                        speaker_id_str = str(speaker["speaker_id"])
-                        if speaker_id_str in custom_names:
-                            custom_name = custom_names[speaker_id_str]
-                            speaker["texts"] = [
-                                text.replace(f"Speaker {speaker['speaker_id']}", custom_name)
-                                for text in speaker["texts"]
-                            ]
-                except json.JSONDecodeError:
-                    pass
-
-            content = json.dumps(transcription_data, ensure_ascii=False, indent=2).encode("utf-8")
+        else:
+            # Sem alterações do usuário: repassar o arquivo como está (cache/OCI)
+            content = await download_result_file(job_id, f"transcription.{format}")
 
         # Determinar content type
         content_type = "application/json" if format == "json" else "text/plain"
@@ -236,7 +320,8 @@ async def download_transcription(
             content=content,
             media_type=content_type,
             headers={
-                "Content-Disposition": f"attachment; filename={job.filename}.{format}"
+                "Content-Disposition": f"attachment; filename={job.filename}.{format}",
+                **etag_headers(etag)
             }
         )
 
@@ -248,80 +333,184 @@ async def download_transcription(
         )
 
 
+@router.get("/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Stream SSE com as mudanças de status/progresso do job e a conclusão
+    de resumo e ata (substitui o polling das rotas GET).
+
+    O primeiro evento é o status atual do job; os seguintes são publicados
+    pelos workers no canal Redis do job. Linhas de comentário (": keepalive")
+    são enviadas periodicamente para manter a conexão aberta.
+
+    Args:
+        job_id: ID do job
+        user_id: ID do usuário autenticado
+        db: Sessão do banco
+
+    Returns:
+        Stream text/event-stream
+
+    Raises:
+        HTTPException 404: Se job não existir
+        HTTPException 403: Se job não pertencer ao usuário
+    """
+    # Validar acesso antes de abrir o stream (erros ainda como 404/403)
+    await load_job_for_user(db, job_id, user_id, Job.id)
+
+    async def read_status():
+        job = await load_job_for_user(
+            db, job_id, user_id,
+            Job.id, Job.status, Job.progress, Job.error_message
+        )
+        # Devolver a conexão ao pool: a sessão não é usada durante o stream
+        await db.close()
+        return {
+            "job_id": job.id,
+            "event": "status",
+            "status": job.status,
+            "progress": job.progress,
+            "error_message": job.error_message
+        }
+
+    async def event_stream():
+        async for event in job_events_service.subscribe(job_id, initial=read_status):
+            if event is None:
+                yield b": keepalive\n\n"
+            else:
+                yield b"data: " + orjson.dumps(event) + b"\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/", response_model=TranscriptionListResponse)
 async def list_transcriptions(
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=100),
     status_filter: Optional[str] = Query(default=None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(default=None),
+    include_total: bool = Query(default=False),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Lista todas as transcrições do usuário com paginação.
 
+    Com `cursor` (o next_cursor opaco da resposta anterior) a paginação é por
+    keyset ((created_at, id) < posição do cursor), com custo constante em
+    qualquer página; sem ele, usa `page` (offset).
+
     Args:
-        page: Página atual (1-indexed)
+        page: Página atual (1-indexed), ignorada quando há cursor
         page_size: Itens por página
         status_filter: Filtrar por status (opcional)
+        cursor: next_cursor da página anterior (opcional)
+        include_total: Também contar o total de itens (query extra)
         current_user: Usuário autenticado
         db: Sessão do banco
 
     Returns:
         Lista paginada de transcrições
+
+    Raises:
+        HTTPException 400: Se status_filter não for um status válido
     """
-    # Query base
-    query = db.query(Job).filter(Job.user_id == current_user.id)
+    # Filtros base
+    filters = [Job.user_id == current_user.id]
 
-    # Filtrar por status se especificado
+    # Filtrar por status se especificado (valor fora do ENUM seria erro no Postgres)
     if status_filter:
-        query = query.filter(Job.status == status_filter.upper())
-
-    # Contar total
-    total = query.count()
+        status_value = status_filter.upper()
+        if status_value not in JOB_STATUSES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Status inválido. Permitidos: {', '.join(JOB_STATUSES)}"
+            )
+        filters.append(Job.status == status_value)
+
+    # Paginação: keyset quando há cursor, offset caso contrário.
+    # Só as colunas da listagem (sem textos/JSONs grandes)
+    query = select(
+        Job.id.label("job_id"),
+        Job.filename,
+        Job.status,
+        Job.progress,
+        Job.duration_seconds,
+        Job.created_at,
+        Job.completed_at
+    ).order_by(Job.created_at.desc(), Job.id.desc())
+    if cursor is not None:
+        # id desempata jobs com o mesmo created_at (nenhum item pulado/repetido)
+        cursor_created_at, cursor_job_id = decode_cursor(current_user.id, cursor)
+        query = query.where(
+            *filters,
+            tuple_(Job.created_at, Job.id) < tuple_(cursor_created_at, cursor_job_id)
+        )
+    else:
+        query = query.where(*filters).offset((page - 1) * page_size)
 
-    # Paginação
-    offset = (page - 1) * page_size
-    jobs = query.order_by(Job.created_at.desc()).offset(offset).limit(page_size).all()
+    # Buscar um item a mais para saber se há próxima página
+    result = await db.execute(query.limit(page_size + 1))
+    rows = result.all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
 
     # Converter para schema
-    items = [
-        TranscriptionListItem(
-            job_id=job.id,
-            filename=job.filename,
-            status=job.status,
-            progress=job.progress,
-            duration_seconds=job.duration_seconds,
-            created_at=job.created_at,
-            completed_at=job.completed_at
-        )
-        for job in jobs
-    ]
+    items = [TranscriptionListItem(**row._mapping) for row in rows]
 
-    total_pages = (total + page_size - 1) // page_size
+    # Contar total apenas quando pedido
+    total = total_pages = None
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(Job).where(*filters))
+        total_pages = (total + page_size - 1) // page_size
 
-    return TranscriptionListResponse(
+    listing = TranscriptionListResponse(
         items=items,
-        total=total,
         page=page,
         page_size=page_size,
+        has_more=has_more,
+        next_cursor=(
+            encode_cursor(current_user.id, rows[-1].created_at, rows[-1].job_id)
+            if has_more else None
+        ),
+        total=total,
         total_pages=total_pages
     )
 
+    # Serializar direto pelo pydantic-core: o response_model revalidaria os
+    # itens e passaria por jsonable_encoder antes do orjson
+    return Response(content=listing.to_json_bytes(), media_type="application/json")
 
-@router.put("/{job_id}/speakers", response_model=UpdateTranscriptionResponse)
+
+@router.put(
+    "/{job_id}/speakers",
+    response_model=UpdateTranscriptionResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
 async def update_speaker_names(
     job_id: str,
     request: UpdateSpeakerNamesRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Atualiza os nomes customizados dos speakers de uma transcrição.
 
+    Os nomes são salvos na hora; o índice FAISS do chat e o JSON com os
+    nomes aplicados são recriados em background por workers Celery.
+
     Args:
         job_id: ID do job
         request: Mapeamento de speaker_id para nome customizado
-        current_user: Usuário autenticado
+        user_id: ID do usuário autenticado
         db: Sessão do banco
 
     Returns:
@@ -331,62 +520,25 @@ async def update_speaker_names(
         HTTPException 404: Se job não existir
         HTTPException 403: Se job não pertencer ao usuário
     """
-    logger.info(f"=== Requisição de atualização de speakers recebida para job {job_id} ===")
-    logger.info(f"Usuário: {current_user.id} ({current_user.email})")
-    logger.info(f"Nomes de speakers: {request.speaker_names}")
+    logger.info(f"Atualização de speakers para job {job_id} (usuário {user_id})")
+    logger.debug("Nomes de speakers: {}", request.speaker_names)
 
-    # Buscar job
-    job = db.query(Job).filter(Job.id == job_id).first()
-
-    if not job:
-        logger.warning(f"Job {job_id} não encontrado")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Job não encontrado"
-        )
-
-    # Verificar permissão
-    if job.user_id != current_user.id:
-        logger.warning(f"Usuário {current_user.id} tentou acessar job {job_id} do usuário {job.user_id}")
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado"
-        )
-
-    # Log valor anterior
-    logger.info(f"Valor anterior de speaker_names: {job.speaker_names}")
-
-    # Salvar mapeamento de nomes como JSON
-    job.speaker_names = json.dumps(request.speaker_names, ensure_ascii=False)
-    db.commit()
+    # Salvar mapeamento de nomes (verificação de acesso no próprio UPDATE)
+    await update_job_for_user(
+        db, job_id, user_id,
+        {"speaker_names": request.speaker_names}
+    )
 
-    # Verificar se foi salvo
-    db.refresh(job)
-    logger.info(f"Valor após commit: {job.speaker_names}")
     logger.info(f"✅ Nomes de speakers salvos com sucesso para job {job_id}")
 
-    # Recriar índice FAISS com os nomes atualizados
+    await _enqueue_materialize_overlay(job_id)
+
+    # Recriar índice FAISS com os nomes atualizados em background (worker Celery)
     try:
-        logger.info(f"Recriando índice FAISS para job {job_id} com nomes atualizados...")
-
-        # Obter texto com nomes customizados aplicados
-        transcription_text = job.edited_transcription if job.edited_transcription else job.transcription_text
-        if transcription_text and job.speaker_names:
-            custom_names = json.loads(job.speaker_names)
-            for speaker_id_str, custom_name in custom_names.items():
-                old_name = f"Speaker {speaker_id_str}"
-                transcription_text = transcription_text.replace(old_name, custom_name)
-
-        # Recriar índice
-        if transcription_text:
-            embeddings_service.create_index_for_job(
-                job_id=job_id,
-                text=transcription_text,
-                metadata={"filename": job.filename}
-            )
-            logger.info(f"✅ Índice FAISS recriado com sucesso para job {job_id}")
+        await run_in_threadpool(rebuild_faiss_index_task.delay, job_id)
+        logger.info(f"Reindexação FAISS enfileirada para job {job_id}")
     except Exception as e:
-        logger.error(f"Erro ao recriar índice FAISS: {str(e)}")
+        logger.error(f"Erro ao enfileirar reindexação FAISS: {str(e)}")
         # Não falhar a requisição se o índice falhar, apenas logar o erro
 
     return UpdateTranscriptionResponse(
@@ -399,8 +551,8 @@ async def update_speaker_names(
 async def update_transcription(
     job_id: str,
     request: UpdateTranscriptionRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Atualiza o texto editado de uma transcrição.
@@ -408,7 +560,7 @@ async def update_transcription(
     Args:
         job_id: ID do job
         request: Texto editado da transcrição
-        current_user: Usuário autenticado
+        user_id: ID do usuário autenticado
         db: Sessão do banco
 
     Returns:
@@ -418,40 +570,21 @@ async def update_transcription(
         HTTPException 404: Se job não existir
         HTTPException 403: Se job não pertencer ao usuário
     """
-    logger.info(f"=== Requisição de edição recebida para job {job_id} ===")
-    logger.info(f"Usuário: {current_user.id} ({current_user.email})")
-    logger.info(f"Tamanho do texto editado: {len(request.edited_text)} chars")
-
-    # Buscar job
-    job = db.query(Job).filter(Job.id == job_id).first()
-
-    if not job:
-        logger.warning(f"Job {job_id} não encontrado")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Job não encontrado"
-        )
-
-    # Verificar permissão
-    if job.user_id != current_user.id:
-        logger.warning(f"Usuário {current_user.id} tentou acessar job {job_id} do usuário {job.user_id}")
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado"
-        )
-
-    # Log valor anterior
-    logger.info(f"Valor anterior de edited_transcription: {job.edited_transcription[:100] if job.edited_transcription else 'None'}...")
+    logger.info(
+        f"Edição da transcrição do job {job_id} (usuário {user_id}): "
+        f"{len(request.edited_text)} chars"
+    )
 
-    # Salvar transcrição editada
-    job.edited_transcription = request.edited_text
-    db.commit()
+    # Salvar transcrição editada (verificação de acesso no próprio UPDATE)
+    await update_job_for_user(
+        db, job_id, user_id,
+        {"edited_transcription": request.edited_text}
+    )
 
-    # Verificar se foi salvo
-    db.refresh(job)
-    logger.info(f"Valor após commit: {job.edited_transcription[:100] if job.edited_transcription else 'None'}...")
     logger.info(f"✅ Transcrição editada salva com sucesso para job {job_id}")
 
+    await _enqueue_materialize_overlay(job_id)
+
     return UpdateTranscriptionResponse(
         job_id=job_id,
         message="Transcrição atualizada com sucesso"
@@ -2,57 +2,123 @@
 Rota de upload de arquivos de áudio/vídeo.
 """
 
+import asyncio
+import os
+import time
 import uuid
+from contextlib import nullcontext
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 from datetime import timedelta
 
-from app.core.database import get_db, User, Job
-from app.core.auth import get_current_user
+from app.core.database import get_db, Job
+from app.core.auth import CurrentUser, get_current_user
 from app.core.config import settings
+from app.core.redis import get_async_redis
 from app.core.utils import now
 from app.services.storage_oci import oci_storage_service
-from app.services.audio_converter import audio_converter_service
+from app.services.audio_converter import ConversionBusyError, audio_converter_service
 from app.workers.tasks import process_transcription_task
 from app.models.schemas import UploadResponse
 
 router = APIRouter()
 
+UPLOAD_RATE_LIMIT_WINDOW_SECONDS = 3600
+
+# Janela deslizante de uploads por usuário, atômica no Redis: descarta entradas
+# fora da janela, conta as restantes e registra o upload atual se couber no limite
+_UPLOAD_RATE_LIMIT_LUA = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', tonumber(ARGV[1]) - tonumber(ARGV[2]))
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+_upload_rate_limit_script = None
+
 
 def check_file_extension(filename: str) -> bool:
     """Verifica se a extensão do arquivo é permitida"""
-    extension = filename.lower().split(".")[-1]
-    return extension in settings.ALLOWED_EXTENSIONS
+    _, dot, extension = filename.rpartition(".")
+    return bool(dot) and extension.lower() in settings.ALLOWED_EXTENSIONS
 
 
-def check_upload_rate_limit(user_id: int, db: Session) -> bool:
+async def check_upload_rate_limit(user_id: int, upload_id: str, db: AsyncSession) -> bool:
     """
     Verifica se o usuário não excedeu o limite de uploads por hora.
 
+    Usa uma janela deslizante no Redis (ratelimit:upload:{user_id}), que já
+    registra o upload quando permitido. Se o Redis estiver indisponível,
+    conta os jobs criados na última hora no banco.
+
     Args:
         user_id: ID do usuário
+        upload_id: ID do upload (registrado na janela se permitido)
         db: Sessão do banco
 
     Returns:
         True se pode fazer upload, False caso contrário
     """
+    global _upload_rate_limit_script
+
+    try:
+        if _upload_rate_limit_script is None:
+            _upload_rate_limit_script = get_async_redis().register_script(_UPLOAD_RATE_LIMIT_LUA)
+
+        allowed = await _upload_rate_limit_script(
+            keys=[f"ratelimit:upload:{user_id}"],
+            args=[
+                time.time(),
+                UPLOAD_RATE_LIMIT_WINDOW_SECONDS,
+                settings.MAX_UPLOADS_PER_HOUR,
+                upload_id
+            ]
+        )
+        return bool(allowed)
+
+    except Exception as e:
+        logger.warning(f"Rate limit de upload via Redis indisponível, usando o banco: {str(e)}")
+
     # Contar uploads na última hora
-    one_hour_ago = now() - timedelta(hours=1)
+    one_hour_ago = now() - timedelta(seconds=UPLOAD_RATE_LIMIT_WINDOW_SECONDS)
 
-    uploads_count = db.query(Job).filter(
-        Job.user_id == user_id,
-        Job.created_at >= one_hour_ago
-    ).count()
+    uploads_count = await db.scalar(
+        select(func.count()).select_from(Job).where(
+            Job.user_id == user_id,
+            Job.created_at >= one_hour_ago
+        )
+    )
 
     return uploads_count < settings.MAX_UPLOADS_PER_HOUR
 
 
+async def release_upload_rate_limit(user_id: int, upload_id: str) -> None:
+    """
+    Remove um upload da janela do rate limit (upload que falhou após a verificação).
+
+    Sem isso, arquivos recusados (tamanho, conversão, falha no OCI) consumiriam
+    a cota por uma hora. Falhas no Redis são apenas logadas.
+
+    Args:
+        user_id: ID do usuário
+        upload_id: ID do upload registrado por check_upload_rate_limit
+    """
+    try:
+        await get_async_redis().zrem(f"ratelimit:upload:{user_id}", upload_id)
+    except Exception as e:
+        logger.warning(f"Erro ao liberar rate limit do upload {upload_id}: {str(e)}")
+
+
 @router.post("/upload", response_model=UploadResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_file(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Faz upload de um arquivo de áudio/vídeo para transcrição.
@@ -76,132 +142,173 @@ async def upload_file(
     if not check_file_extension(file.filename):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Extensão não permitida. Permitidas: {', '.join(settings.ALLOWED_EXTENSIONS)}"
+            detail=f"Extensão não permitida. Permitidas: {', '.join(sorted(settings.ALLOWED_EXTENSIONS))}"
         )
 
-    # 2. Verificar rate limit
-    if not check_upload_rate_limit(current_user.id, db):
+    # 2. Verificar rate limit (o ID do job identifica o upload na janela)
+    job_id = str(uuid.uuid4())
+
+    if not await check_upload_rate_limit(current_user.id, job_id, db):
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail=f"Limite de {settings.MAX_UPLOADS_PER_HOUR} uploads por hora excedido"
         )
 
-    # 3. Ler conteúdo do arquivo
-    file_content = await file.read()
-    file_size = len(file_content)
-
-    # 4. Verificar tamanho do arquivo
-    max_size_bytes = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
-    if file_size > max_size_bytes:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"Arquivo muito grande. Máximo: {settings.MAX_UPLOAD_SIZE_MB}MB"
-        )
-
-    logger.info(f"Arquivo validado: {file.filename} ({file_size / (1024*1024):.2f}MB)")
-
-    # 5. Converter áudio para WAV se necessário
-    final_filename = file.filename
-    final_content = file_content
-
-    if audio_converter_service.is_conversion_needed(file.filename):
-        try:
-            logger.info(f"Convertendo {file.filename} para WAV...")
-            from io import BytesIO
-
-            wav_content, wav_filename = audio_converter_service.convert_to_wav(
-                input_file=BytesIO(file_content),
-                input_filename=file.filename
-            )
-
-            final_content = wav_content
-            final_filename = wav_filename
-            file_size = len(final_content)
-
-            logger.info(
-                f"Conversão concluída: {file.filename} -> {wav_filename} "
-                f"({len(file_content) / (1024*1024):.2f}MB -> {file_size / (1024*1024):.2f}MB)"
-            )
-
-        except Exception as e:
-            logger.error(f"Erro na conversão de áudio: {str(e)}")
+    try:
+        # 3. Medir o arquivo sem lê-lo: o Starlette já o recebeu em um
+        # SpooledTemporaryFile (em disco acima de 1MB), usado direto daqui em diante
+        upload = file.file
+        upload.seek(0, os.SEEK_END)
+        file_size = upload.tell()
+        upload.seek(0)
+
+        # 4. Verificar tamanho do arquivo
+        max_size_bytes = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+        if file_size > max_size_bytes:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Erro ao converter áudio: {str(e)}"
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Arquivo muito grande. Máximo: {settings.MAX_UPLOAD_SIZE_MB}MB"
             )
-    else:
-        logger.info(f"Arquivo {file.filename} já é WAV, sem necessidade de conversão")
 
-    # 6. Fazer upload para OCI Object Storage
-    try:
-        # Gerar caminho único (usar nome final após conversão)
+        logger.info(f"Arquivo validado: {file.filename} ({file_size / (1024*1024):.2f}MB)")
+
+        # 5. Converter áudio para WAV se necessário (saída em arquivo temporário)
+        final_filename = file.filename
+        wav_path = None
+
+        if audio_converter_service.is_conversion_needed(file.filename):
+            try:
+                logger.info(f"Convertendo {file.filename} para WAV...")
+
+                wav_path, wav_filename = await run_in_threadpool(
+                    audio_converter_service.convert_to_wav,
+                    input_file=upload,
+                    input_filename=file.filename
+                )
+
+                original_size = file_size
+                final_filename = wav_filename
+                file_size = os.path.getsize(wav_path)
+
+                logger.info(
+                    f"Conversão concluída: {file.filename} -> {wav_filename} "
+                    f"({original_size / (1024*1024):.2f}MB -> {file_size / (1024*1024):.2f}MB)"
+                )
+
+            except ConversionBusyError as e:
+                logger.warning(f"Conversão recusada para {file.filename}: {str(e)}")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Servidor ocupado convertendo outros arquivos. Tente novamente em instantes.",
+                    headers={"Retry-After": "30"}
+                )
+
+            except Exception as e:
+                logger.error(f"Erro na conversão de áudio: {str(e)}")
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Erro ao converter áudio: {str(e)}"
+                )
+        else:
+            logger.info(f"Arquivo {file.filename} já é WAV, sem necessidade de conversão")
+
+        # 6. Gerar caminho único (usar nome final após conversão)
         object_path = oci_storage_service.generate_upload_path(
             user_id=current_user.id,
-            filename=final_filename
+            filename=final_filename,
+            job_id=job_id
         )
 
-        logger.info(f"Fazendo upload para OCI: {object_path}")
-
-        # Upload (usar conteúdo final após conversão)
-        from io import BytesIO
-        file_obj = BytesIO(final_content)
-
         # Determinar content_type correto
         content_type = "audio/wav" if final_filename.endswith(".wav") else file.content_type
 
-        oci_storage_service.upload_file(
-            file_content=file_obj,
-            object_name=object_path,
-            content_type=content_type
+        # 7. Upload para o OCI e criação do job em paralelo: o INSERT não depende
+        # do upload; só o enfileiramento da task precisa dos dois concluídos.
+        # O job nasce UPLOADING e só passa a QUEUED com o objeto já no bucket
+        new_job = Job(
+            id=job_id,
+            user_id=current_user.id,
+            filename=final_filename,  # Usar nome final após conversão
+            file_size=file_size,
+            file_url=object_path,  # Salvar object path, não URL completa
+            status="UPLOADING",
+            progress=0.0
         )
+        db.add(new_job)
 
-        file_url = oci_storage_service.get_object_url(object_path)
-
-        logger.info(f"Upload para OCI concluído: {file_url}")
-
-    except Exception as e:
-        logger.error(f"Erro ao fazer upload para OCI: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erro ao fazer upload: {str(e)}"
-        )
+        logger.info(f"Fazendo upload para OCI: {object_path}")
 
-    # 7. Criar job no banco de dados
-    job_id = str(uuid.uuid4())
+        try:
+            # Upload em streaming do arquivo final (WAV convertido ou o próprio upload)
+            with (open(wav_path, "rb") if wav_path else nullcontext(upload)) as final_file:
+                upload_result, commit_result = await asyncio.gather(
+                    run_in_threadpool(
+                        oci_storage_service.upload_file,
+                        file_content=final_file,
+                        object_name=object_path,
+                        content_type=content_type,
+                        size=file_size
+                    ),
+                    db.commit(),
+                    return_exceptions=True
+                )
+        finally:
+            if wav_path:
+                os.unlink(wav_path)
+
+        if isinstance(commit_result, BaseException):
+            logger.error(f"Erro ao criar job {job_id}: {str(commit_result)}")
+            # Sem o job, o objeto enviado ficaria órfão no bucket
+            if not isinstance(upload_result, BaseException):
+                try:
+                    await run_in_threadpool(oci_storage_service.delete_file, object_path)
+                except Exception as e:
+                    logger.warning(f"Erro ao remover upload órfão {object_path}: {str(e)}")
+            raise commit_result
+
+        if isinstance(upload_result, BaseException):
+            logger.error(f"Erro ao fazer upload para OCI: {str(upload_result)}")
+            # Desfazer o job criado em paralelo (se falhar, o job fica UPLOADING
+            # e é removido pela limpeza periódica)
+            try:
+                await db.delete(new_job)
+                await db.commit()
+            except Exception as e:
+                logger.error(f"Erro ao remover job {job_id} após falha no upload: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Erro ao fazer upload: {str(upload_result)}"
+            )
 
-    new_job = Job(
-        id=job_id,
-        user_id=current_user.id,
-        filename=final_filename,  # Usar nome final após conversão
-        file_size=file_size,
-        file_url=object_path,  # Salvar object path, não URL completa
-        status="QUEUED",
-        progress=0.0
-    )
+        logger.info(f"Upload para OCI concluído: {object_path}")
+        logger.info(f"Job criado: {job_id}")
 
-    db.add(new_job)
-    db.commit()
+        # 8. Liberar o job para processamento e enfileirar task Celery
+        new_job.status = "QUEUED"
+        await db.commit()
 
-    logger.info(f"Job criado: {job_id}")
+        try:
+            await run_in_threadpool(process_transcription_task.delay, job_id, object_path)
+            logger.info(f"Task enfileirada para job {job_id}")
 
-    # 7. Enfileirar task Celery
-    try:
-        process_transcription_task.delay(job_id, object_path)
-        logger.info(f"Task enfileirada para job {job_id}")
+        except Exception as e:
+            logger.error(f"Erro ao enfileirar task: {str(e)}")
+            # Atualizar status do job
+            new_job.status = "FAILED"
+            new_job.error_message = f"Erro ao enfileirar: {str(e)}"
+            await db.commit()
 
-    except Exception as e:
-        logger.error(f"Erro ao enfileirar task: {str(e)}")
-        # Atualizar status do job
-        new_job.status = "FAILED"
-        new_job.error_message = f"Erro ao enfileirar: {str(e)}"
-        db.commit()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Erro ao processar arquivo"
+            )
 
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Erro ao processar arquivo"
-        )
+    except BaseException:
+        # Upload não aceito: não contar na cota de uploads por hora
+        await release_upload_rate_limit(current_user.id, job_id)
+        raise
 
-    # 8. Retornar resposta
+    # 9. Retornar resposta
     return UploadResponse(
         job_id=job_id,
         filename=final_filename,  # Retornar nome final
@@ -3,32 +3,67 @@ Sistema de autenticação JWT com access e refresh tokens.
 Inclui hashing de senhas com bcrypt.
 """
 
+import asyncio
+import hashlib
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from typing import NamedTuple, Optional, Dict, Any, Tuple
+import bcrypt
+import jwt
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.database import get_db, User
 
-# Contexto para hashing de senhas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Security scheme para FastAPI
 security = HTTPBearer()
 
+# Cache de tokens já verificados: sha256(token)[:32] -> (user_id, exp)
+# Evita decodificar/verificar a assinatura do mesmo JWT a cada requisição.
+_token_cache: TTLCache = TTLCache(maxsize=10000, ttl=30)
+
+# Cache de logins recentes: sha256(email:senha) -> (user_id, hashed_password)
+# Evita repetir o bcrypt quando o mesmo cliente refaz o login em sequência.
+_login_cache: TTLCache = TTLCache(maxsize=2048, ttl=60)
+_login_locks: Dict[str, asyncio.Lock] = {}
+
+
+class CurrentUser(NamedTuple):
+    """Dados do usuário autenticado (snapshot imutável, fora de qualquer sessão)"""
+    id: int
+    email: str
+    username: str
+    is_active: bool
+    created_at: datetime
+
+
+# Usuários autenticados por user_id, como CurrentUser: nunca o objeto ORM, que
+# fica preso à sessão da requisição que o carregou (e expira em um rollback).
+# is_active/username mudam raramente; o TTL curto limita por quanto tempo uma
+# desativação pode demorar a valer.
+_user_cache: TTLCache = TTLCache(maxsize=10000, ttl=60)
+
+# Pares de tokens emitidos recentemente por user_id: retentativas de
+# login/registro em sequência recebem o mesmo par sem assinar novamente.
+_issued_tokens_cache: TTLCache = TTLCache(maxsize=4096, ttl=10)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifica se a senha corresponde ao hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verifica se a senha corresponde ao hash (bloqueante: chamar via asyncio.to_thread)"""
+    try:
+        return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+    except ValueError:
+        # Hash malformado no banco
+        return False
 
 
 def get_password_hash(password: str) -> str:
-    """Gera hash bcrypt da senha"""
-    return pwd_context.hash(password)
+    """Gera hash bcrypt da senha (bloqueante: chamar via asyncio.to_thread)"""
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
@@ -44,12 +79,11 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     """
     to_encode = data.copy()
 
+    # exp como epoch inteiro (dispensa a conversão de datetime no encode)
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = int(time.time() + expires_delta.total_seconds())
     else:
-        expire = datetime.utcnow() + timedelta(
-            minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES
-        )
+        expire = int(time.time()) + settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60
 
     to_encode.update({
         "exp": expire,
@@ -76,7 +110,7 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
         Refresh token JWT assinado
     """
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS)
+    expire = int(time.time()) + settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS * 86400
 
     to_encode.update({
         "exp": expire,
@@ -112,7 +146,7 @@ def decode_token(token: str) -> Dict[str, Any]:
             algorithms=[settings.JWT_ALGORITHM]
         )
         return payload
-    except JWTError as e:
+    except jwt.InvalidTokenError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Token inválido: {str(e)}",
@@ -120,24 +154,34 @@ def decode_token(token: str) -> Dict[str, Any]:
         )
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+def _token_cache_key(token: str) -> str:
+    """Chave do cache de tokens (nunca armazena o token em si)"""
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+def _get_verified_user_id(token: str) -> int:
     """
-    Dependency para obter o usuário atual a partir do token JWT.
+    Valida um access token e retorna o user_id contido nele.
+
+    Tokens verificados recentemente são servidos do cache, sem
+    decodificar novamente o JWT.
 
     Args:
-        credentials: Credenciais HTTP Bearer extraídas do header
-        db: Sessão do banco de dados
+        token: Access token JWT
 
     Returns:
-        Objeto User do usuário autenticado
+        ID do usuário
 
     Raises:
-        HTTPException: Se o token for inválido ou usuário não existir
+        HTTPException: Se o token for inválido
     """
-    token = credentials.credentials
+    cache_key = _token_cache_key(token)
+
+    cached: Optional[Tuple[int, float]] = _token_cache.get(cache_key)
+
+    if cached is not None and cached[1] > time.time():
+        return cached[0]
+
     payload = decode_token(token)
 
     # Verificar tipo do token
@@ -167,8 +211,46 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Buscar usuário no banco
-    user = db.query(User).filter(User.id == user_id).first()
+    _token_cache[cache_key] = (user_id, payload.get("exp", 0))
+
+    return user_id
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> CurrentUser:
+    """
+    Dependency para obter o usuário atual a partir do token JWT.
+
+    O usuário é mantido em cache por user_id (ver _user_cache), evitando uma
+    query por requisição.
+
+    Args:
+        credentials: Credenciais HTTP Bearer extraídas do header
+        db: Sessão do banco de dados
+
+    Returns:
+        CurrentUser do usuário autenticado
+
+    Raises:
+        HTTPException: Se o token for inválido ou usuário não existir
+    """
+    token = credentials.credentials
+    user_id = _get_verified_user_id(token)
+
+    # Buscar usuário no cache ou no banco
+    user = _user_cache.get(user_id)
+    if user is None:
+        result = await db.execute(
+            select(User.id, User.email, User.username, User.is_active, User.created_at)
+            .where(User.id == user_id)
+        )
+        row = result.one_or_none()
+        if row is not None:
+            user = CurrentUser(*row)
+            _user_cache[user_id] = user
+
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -186,6 +268,27 @@ def get_current_user(
     return user
 
 
+async def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> int:
+    """
+    Dependency leve que apenas valida o access token e retorna o user_id.
+
+    Não consulta o banco: rotas que a usam devem verificar o usuário na
+    própria query (ver app.api.deps.load_job_for_user).
+
+    Args:
+        credentials: Credenciais HTTP Bearer extraídas do header
+
+    Returns:
+        ID do usuário autenticado
+
+    Raises:
+        HTTPException: Se o token for inválido
+    """
+    return _get_verified_user_id(credentials.credentials)
+
+
 def verify_refresh_token(token: str) -> Dict[str, Any]:
     """
     Valida um refresh token e retorna seu payload.
@@ -212,7 +315,7 @@ def verify_refresh_token(token: str) -> Dict[str, Any]:
     return payload
 
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
     """
     Autentica um usuário com email e senha.
 
@@ -224,17 +327,59 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     Returns:
         Objeto User se autenticado, None caso contrário
     """
-    user = db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalar_one_or_none()
 
     if not user:
         return None
 
-    if not verify_password(password, user.hashed_password):
+    # bcrypt é CPU-bound: executar fora do event loop
+    if not await asyncio.to_thread(verify_password, password, user.hashed_password):
         return None
 
     return user
 
 
+async def authenticate_user_cached(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    """
+    Versão de authenticate_user com cache de verificações bem-sucedidas.
+
+    Logins repetidos com as mesmas credenciais dentro do TTL do cache pulam
+    o bcrypt e carregam o usuário pelo ID. Requisições simultâneas para as
+    mesmas credenciais aguardam um único cálculo do hash.
+
+    Args:
+        db: Sessão do banco de dados
+        email: Email do usuário
+        password: Senha em texto plano
+
+    Returns:
+        Objeto User se autenticado, None caso contrário
+    """
+    cache_key = hashlib.sha256(f"{email}:{password}".encode()).hexdigest()
+    lock = _login_locks.setdefault(cache_key, asyncio.Lock())
+
+    try:
+        async with lock:
+            cached = _login_cache.get(cache_key)
+            if cached is not None:
+                user_id, hashed_password = cached
+                result = await db.execute(select(User).where(User.id == user_id))
+                user = result.scalar_one_or_none()
+                # Senha alterada desde o cache: refazer a verificação completa
+                if user is not None and user.hashed_password == hashed_password:
+                    return user
+
+            user = await authenticate_user(db, email, password)
+            if user is not None:
+                _login_cache[cache_key] = (user.id, user.hashed_password)
+
+            return user
+    finally:
+        if not lock.locked():
+            _login_locks.pop(cache_key, None)
+
+
 def create_tokens_for_user(user: User) -> Dict[str, str]:
     """
     Cria access e refresh tokens para um usuário.
@@ -245,11 +390,18 @@ def create_tokens_for_user(user: User) -> Dict[str, str]:
     Returns:
         Dict com access_token e refresh_token
     """
+    cached = _issued_tokens_cache.get(user.id)
+    if cached is not None:
+        return dict(cached)
+
     access_token = create_access_token(data={"sub": str(user.id)})
     refresh_token = create_refresh_token(data={"sub": str(user.id)})
 
-    return {
+    tokens = {
         "access_token": access_token,
         "refresh_token": refresh_token,
         "token_type": "bearer"
     }
+    _issued_tokens_cache[user.id] = tokens
+
+    return dict(tokens)
@@ -3,14 +3,17 @@ Configuração central da aplicação usando Pydantic Settings.
 Carrega variáveis de ambiente e fornece validação de tipos.
 """
 
-from typing import List
-from pydantic_settings import BaseSettings
-from pydantic import Field, validator
+from typing import FrozenSet, Tuple, Union
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import Field, field_validator
 
 
 class Settings(BaseSettings):
     """Configurações da aplicação carregadas de variáveis de ambiente"""
 
+    # frozen: imutável (e hashable) depois de carregado
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, frozen=True)
+
     # Azure Speech Service
     AZURE_SPEECH_REGION: str = Field(..., description="Região do Azure Speech Service")
     AZURE_SPEECH_KEY: str = Field(..., description="Chave de API do Azure Speech")
@@ -27,6 +30,11 @@ class Settings(BaseSettings):
         default="2024-02-15-preview",
         description="Versão da API Azure OpenAI"
     )
+    AZURE_OPENAI_EMBEDDING_CONCURRENCY: int = Field(
+        default=8,
+        ge=1,
+        description="Máximo de batches de embeddings em paralelo por processo"
+    )
 
     # Oracle Cloud Infrastructure
     OCI_NAMESPACE: str = Field(..., description="Namespace do OCI Object Storage")
@@ -41,6 +49,14 @@ class Settings(BaseSettings):
     REDIS_HOST: str = Field(default="localhost", description="Host do Redis")
     REDIS_PORT: int = Field(default=6379, description="Porta do Redis")
     REDIS_DB: int = Field(default=0, description="Database do Redis")
+    RESULT_CACHE_TTL_SECONDS: int = Field(
+        default=86400,
+        description="TTL do cache Redis dos arquivos de resultado baixados do OCI"
+    )
+    LLM_CACHE_TTL_SECONDS: int = Field(
+        default=86400,
+        description="TTL do cache Redis de resumos e atas gerados pelo Azure OpenAI"
+    )
 
     # FAISS
     FAISS_PATH: str = Field(
@@ -73,28 +89,38 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = Field(default="INFO", description="Nível de log")
 
     # CORS
-    CORS_ORIGINS: str = Field(
+    # Listas vêm do ambiente como string separada por vírgula; o Union com str
+    # evita que o pydantic-settings exija JSON para tipos compostos
+    CORS_ORIGINS: Union[Tuple[str, ...], str] = Field(
         default="http://localhost:3000,http://localhost:8000",
+        validate_default=True,
         description="Origens permitidas para CORS (separadas por vírgula)"
     )
 
-    @validator("CORS_ORIGINS")
-    def parse_cors_origins(cls, v: str) -> List[str]:
-        """Converte string de origens em lista"""
-        return [origin.strip() for origin in v.split(",")]
+    @field_validator("CORS_ORIGINS")
+    @classmethod
+    def parse_cors_origins(cls, v: Union[Tuple[str, ...], str]) -> Tuple[str, ...]:
+        """Converte string de origens em tupla"""
+        if isinstance(v, str):
+            v = v.split(",")
+        return tuple(origin.strip() for origin in v)
 
     # Upload Limits
     MAX_UPLOAD_SIZE_MB: int = Field(default=500, description="Tamanho máximo de upload em MB")
     MAX_UPLOADS_PER_HOUR: int = Field(default=3, description="Máximo de uploads por hora")
-    ALLOWED_EXTENSIONS: str = Field(
+    ALLOWED_EXTENSIONS: Union[FrozenSet[str], str] = Field(
         default="mp3,wav,mp4,m4a,avi,mov,webm,asf",
+        validate_default=True,
         description="Extensões permitidas (separadas por vírgula)"
     )
 
-    @validator("ALLOWED_EXTENSIONS")
-    def parse_allowed_extensions(cls, v: str) -> List[str]:
-        """Converte string de extensões em lista"""
-        return [ext.strip().lower() for ext in v.split(",")]
+    @field_validator("ALLOWED_EXTENSIONS")
+    @classmethod
+    def parse_allowed_extensions(cls, v: Union[FrozenSet[str], str]) -> FrozenSet[str]:
+        """Converte string de extensões em conjunto (busca O(1) no upload)"""
+        if isinstance(v, str):
+            v = v.split(",")
+        return frozenset(ext.strip().lower() for ext in v)
 
     # Rate Limiting
     RATE_LIMIT_CHAT: str = Field(default="20/minute", description="Rate limit para chat")
@@ -135,10 +161,10 @@ class Settings(BaseSettings):
         default=5,
         description="Número máximo de chunks de contexto para RAG"
     )
-
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    TRUSTED_INTERNAL_JSON: bool = Field(
+        default=True,
+        description="Montar frases/speakers do transcription.json (gerado pelo worker) sem validação Pydantic"
+    )
 
 
 # Instância global de configurações
@@ -3,21 +3,84 @@ Configuração do banco de dados SQLite para armazenamento de usuários e jobs.
 Usa SQLAlchemy para ORM.
 """
 
-from sqlalchemy import create_engine, Column, String, Integer, DateTime, Boolean, Text, Float
+from typing import AsyncGenerator
+
+import orjson
+from sqlalchemy import (
+    create_engine, Column, String, Integer, DateTime, Boolean, Text, Float, UniqueConstraint, Index,
+    JSON, Enum, event, inspect, text
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import deferred, sessionmaker
 from app.core.config import settings
 from app.core.utils import now
 
+_IS_SQLITE = settings.DATABASE_URL.startswith("sqlite")
+
+# check_same_thread: necessário para SQLite; timeout: espera pelo lock de escrita
+_CONNECT_ARGS = {"check_same_thread": False, "timeout": 30} if _IS_SQLITE else {}
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Configura cada conexão SQLite nova.
+
+    WAL permite leituras concorrentes com a escrita e, com synchronous=NORMAL,
+    o commit não faz fsync a cada transação (só nos checkpoints).
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
 # Engine SQLite
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False},  # Necessário para SQLite
-    echo=settings.DEBUG
+    connect_args=_CONNECT_ARGS,
+    echo=settings.DEBUG,
+    # Colunas JSON serializadas/parseadas com orjson
+    json_serializer=lambda obj: orjson.dumps(obj).decode("utf-8"),
+    json_deserializer=orjson.loads
+)
+
+# Session factory (workers Celery): os tasks commitam a cada etapa e voltam a ler
+# o job (ex.: _publish_status); sem expirar no commit, isso não refaz o SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+def _async_database_url(url: str) -> str:
+    """Converte a URL do banco para o driver assíncrono equivalente"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith(("postgresql:", "postgresql+psycopg2:", "postgres:")):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+
+# Engine assíncrono usado pelas rotas da API (os workers Celery usam o síncrono)
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    connect_args=_CONNECT_ARGS,
+    echo=settings.DEBUG,
+    json_serializer=lambda obj: orjson.dumps(obj).decode("utf-8"),
+    json_deserializer=orjson.loads
 )
 
-# Session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if _IS_SQLITE:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+# Session factory assíncrona
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False  # Evita lazy-loads implícitos após commit
+)
 
 # Base para modelos
 Base = declarative_base()
@@ -26,36 +89,72 @@ Base = declarative_base()
 class User(Base):
     """Modelo de usuário para autenticação"""
     __tablename__ = "users"
+    __table_args__ = (
+        # Constraints nomeadas para identificar o campo duplicado no IntegrityError
+        UniqueConstraint("email", name="uq_users_email"),
+        UniqueConstraint("username", name="uq_users_username"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True, nullable=False)
-    username = Column(String, unique=True, index=True, nullable=False)
+    email = Column(String, nullable=False)
+    username = Column(String, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=now)
     updated_at = Column(DateTime, default=now, onupdate=now)
 
 
+# Grupo das colunas grandes (textos/JSON) de Job, adiadas por padrão
+JOB_CONTENT_GROUP = "content"
+
+# Status possíveis de um job (UPLOADING: criado, arquivo ainda indo para o OCI)
+JOB_STATUSES = ("UPLOADING", "QUEUED", "PROCESSING", "COMPLETED", "FAILED")
+
+
 class Job(Base):
     """Modelo de job de transcrição"""
     __tablename__ = "jobs"
-
-    id = Column(String, primary_key=True, index=True)  # UUID
-    user_id = Column(Integer, index=True, nullable=False)
+    __table_args__ = (
+        # Índice de cobertura para o lookup job_id + verificação de dono/status
+        Index("ix_jobs_id_covering", "id", "user_id", "status"),
+        # Listagem paginada por usuário (com e sem filtro de status), ordenada por data
+        Index("ix_jobs_user_created", "user_id", "created_at"),
+        Index("ix_jobs_user_status_created", "user_id", "status", "created_at"),
+        # Limpeza periódica de jobs antigos por status (cleanup_old_jobs)
+        Index("ix_jobs_status_created", "status", "created_at"),
+    )
+
+    id = Column(String, primary_key=True)  # UUID
+    user_id = Column(Integer, nullable=False)  # Indexado por ix_jobs_user_created (prefixo user_id)
     filename = Column(String, nullable=False)
     file_size = Column(Integer)  # bytes
     file_url = Column(String, nullable=False)  # URL no OCI Object Storage
 
-    status = Column(String, default="QUEUED")  # QUEUED, PROCESSING, COMPLETED, FAILED
+    status = Column(
+        Enum(*JOB_STATUSES, name="job_status", create_constraint=True),
+        default="QUEUED",
+        nullable=False
+    )  # CHECK no SQLite, ENUM nativo no Postgres
     progress = Column(Float, default=0.0)  # 0.0 a 1.0
 
     # Resultados
+    # Colunas grandes ficam no grupo "content", carregado só quando pedido
+    # (options(undefer_group(JOB_CONTENT_GROUP)) ou acesso ao atributo em sessão síncrona)
     transcription_url = Column(String)  # URL do JSON completo no OCI
-    transcription_text = Column(Text)  # Texto completo da transcrição
-    edited_transcription = Column(Text)  # Transcrição editada pelo usuário
-    speaker_names = Column(Text)  # JSON com mapeamento {speaker_id: nome_customizado}
-    summary = Column(Text)  # Resumo gerado
-    meeting_minutes = Column(Text)  # Ata de reunião gerada (JSON)
+    transcription_text = deferred(Column(Text), group=JOB_CONTENT_GROUP)  # Texto completo da transcrição
+    edited_transcription = deferred(Column(Text), group=JOB_CONTENT_GROUP)  # Transcrição editada pelo usuário
+    speaker_names = deferred(
+        Column(JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")),
+        group=JOB_CONTENT_GROUP
+    )  # Mapeamento {speaker_id: nome_customizado} (dict)
+    summary = deferred(Column(Text), group=JOB_CONTENT_GROUP)  # Resumo gerado
+    meeting_minutes = deferred(
+        Column(JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")),
+        group=JOB_CONTENT_GROUP
+    )  # Ata de reunião gerada (dict)
+    meeting_minutes_status = Column(String)  # GENERATING enquanto a task de ata está na fila
+    meeting_minutes_claimed_at = Column(DateTime)  # Quando o GENERATING foi marcado (expira após o time limit)
+    overlay_version = Column(String)  # Versão do transcription.overlayed.{versão}.json já gerado no OCI
     duration_seconds = Column(Float)  # Duração do áudio
 
     # Metadados Azure Speech
@@ -65,27 +164,65 @@ class Job(Base):
     created_at = Column(DateTime, default=now)
     started_at = Column(DateTime)
     completed_at = Column(DateTime)
+    updated_at = Column(DateTime, default=now, onupdate=now)  # Usado no ETag das rotas GET
 
     # Erro (se houver)
     error_message = Column(Text)
 
 
-def get_db():
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Dependency para obter sessão do banco de dados.
-    Uso: db: Session = Depends(get_db)
+    Dependency para obter sessão assíncrona do banco de dados.
+    Uso: db: AsyncSession = Depends(get_db)
+
+    Os workers Celery continuam usando SessionLocal (síncrono).
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 def init_db():
     """Cria todas as tabelas no banco de dados"""
     Base.metadata.create_all(bind=engine)
 
+    # create_all não adiciona colunas novas a tabelas que já existem
+    _add_missing_columns()
+
+    # Nem valores novos a um ENUM nativo já criado (Postgres)
+    _add_missing_enum_values()
+
+    # create_all não adiciona índices novos a tabelas que já existem
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def _add_missing_columns():
+    """Adiciona (ALTER TABLE ADD COLUMN) colunas dos modelos ausentes no banco"""
+    inspector = inspect(engine)
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                ))
+
+
+def _add_missing_enum_values():
+    """Adiciona (ALTER TYPE ADD VALUE) status de job ausentes no ENUM do Postgres"""
+    if engine.dialect.name != "postgresql":
+        return
+
+    # ADD VALUE não pode ser usado na mesma transação que o cria
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for job_status in JOB_STATUSES:
+            conn.execute(text(f"ALTER TYPE job_status ADD VALUE IF NOT EXISTS '{job_status}'"))
+
 
 def drop_db():
     """Dropa todas as tabelas (usar com cuidado!)"""
@@ -0,0 +1,52 @@
+"""
+Clientes Redis compartilhados pela API e pelos workers.
+
+Os clientes são criados sob demanda (a conexão em si também é lazy), para
+que importar o módulo não exija o Redis disponível.
+"""
+
+import hashlib
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+_client: Optional[redis.Redis] = None
+_async_client: Optional[aioredis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """Cliente Redis síncrono (workers Celery)"""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+def result_cache_key(job_id: str, filename: str) -> str:
+    """Chave do cache de um arquivo de resultado do job (ver download_result_file)"""
+    return f"transcription:{job_id}:{filename}"
+
+
+def llm_cache_key(kind: str, job_id: str, transcript: str, max_tokens: int, temperature: float) -> str:
+    """
+    Chave do cache de um resumo/ata (kind) gerado para um texto e parâmetros.
+
+    O hash do texto faz parte da chave: se a transcrição mudar, a chave antiga
+    simplesmente deixa de ser usada.
+    """
+    digest = hashlib.blake2s(
+        f"{max_tokens}:{temperature}:{transcript}".encode(),
+        digest_size=16
+    ).hexdigest()
+    return f"{kind}:{job_id}:{digest}"
+
+
+def get_async_redis() -> aioredis.Redis:
+    """Cliente Redis assíncrono (rotas da API)"""
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.Redis.from_url(settings.REDIS_URL)
+    return _async_client
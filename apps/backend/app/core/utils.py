@@ -2,7 +2,14 @@
 Utilitários gerais da aplicação
 """
 
+import hashlib
+import json
+import re
 from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+# "Speaker N" -> grupo 1 = N (não casa "Speaker 1" dentro de "Speaker 10")
+_SPEAKER_RE = re.compile(r"Speaker (\d+)")
 
 
 def now() -> datetime:
@@ -18,3 +25,85 @@ def now() -> datetime:
         datetime: Timestamp atual em UTC com timezone aware
     """
     return datetime.now(timezone.utc)
+
+
+def apply_speaker_names(text: str, custom_names: Dict[str, str]) -> str:
+    """
+    Substitui "Speaker N" pelo nome customizado em uma única passada pelo texto.
+
+    Args:
+        text: Texto com rótulos "Speaker N"
+        custom_names: Mapeamento {speaker_id: nome_customizado}
+
+    Returns:
+        Texto com os nomes aplicados (speakers sem nome ficam como estão)
+    """
+    if not custom_names or not text:
+        return text
+
+    return _SPEAKER_RE.sub(
+        lambda m: custom_names.get(m.group(1), m.group(0)),
+        text
+    )
+
+
+def apply_transcription_overlay(
+    transcription_data: Dict[str, Any],
+    edited_text: Optional[str],
+    custom_names: Optional[Dict[str, str]]
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Aplica as alterações do usuário (texto editado e nomes de speakers)
+    sobre o JSON original da transcrição.
+
+    Args:
+        transcription_data: JSON da transcrição (não é modificado)
+        edited_text: Texto editado pelo usuário, se houver
+        custom_names: Mapeamento {speaker_id: nome} salvo no job, se houver
+
+    Returns:
+        Tupla (full_text, speakers) com as alterações aplicadas
+    """
+    # Usar texto editado se existir, caso contrário usar o original
+    full_text = edited_text or transcription_data.get("full_text", "")
+    speakers = transcription_data.get("speakers", [])
+
+    if not custom_names:
+        return full_text, speakers
+
+    # Substituir "Speaker N" em uma única passada por texto
+    speakers = [
+        {
+            **speaker,
+            "texts": [apply_speaker_names(text, custom_names) for text in speaker.get("texts", [])]
+        }
+        for speaker in speakers
+    ]
+
+    return apply_speaker_names(full_text, custom_names), speakers
+
+
+def overlay_version(edited_text: Optional[str], custom_names: Optional[Dict[str, str]]) -> Optional[str]:
+    """
+    Identifica o conteúdo das alterações do usuário sobre a transcrição.
+
+    Args:
+        edited_text: Texto editado pelo usuário, se houver
+        custom_names: Mapeamento {speaker_id: nome} salvo no job, se houver
+
+    Returns:
+        Hash curto das alterações, ou None se não houver alterações
+    """
+    if not edited_text and not custom_names:
+        return None
+
+    digest = hashlib.blake2s(digest_size=8)
+    digest.update((edited_text or "").encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(json.dumps(custom_names or {}, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def overlay_filename(version: str) -> str:
+    """Nome do arquivo de resultado com as alterações do usuário já aplicadas"""
+    return f"transcription.overlayed.{version}.json"
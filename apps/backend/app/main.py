@@ -3,13 +3,15 @@ Aplicação FastAPI principal.
 """
 
 from fastapi import FastAPI, Request
+from fastapi.routing import APIRoute
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from loguru import logger
 import sys
 
 from app.core.config import settings
 from app.core.database import init_db
+from app.api.body_limit import BodySizeLimitMiddleware
 from app.api.routes import auth, upload, jobs, transcriptions, chat, summary, meeting_minutes
 
 # Configurar logger
@@ -26,7 +28,15 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="API para transcrição de áudio/vídeo com IA",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse  # Serialização das respostas com orjson
+)
+
+# Limite de tamanho do corpo (uploads grandes recusados antes da transferência).
+# Adicionado antes do CORS para que o 413 também receba os headers de CORS.
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body_size=(settings.MAX_UPLOAD_SIZE_MB + 1) * 1024 * 1024  # +1MB para o envelope multipart
 )
 
 # CORS Middleware
@@ -44,7 +54,7 @@ app.add_middleware(
 async def global_exception_handler(request: Request, exc: Exception):
     """Handler global de exceções"""
     logger.error(f"Erro não tratado: {str(exc)}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal Server Error",
@@ -114,6 +124,27 @@ app.include_router(
 )
 
 
+def assert_unique_routes(application: FastAPI) -> None:
+    """
+    Garante que nenhuma rota foi registrada duas vezes (mesmo path e método).
+
+    Raises:
+        RuntimeError: Se houver rotas duplicadas
+    """
+    seen = set()
+    for route in application.router.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        for method in route.methods:
+            key = (route.path, method)
+            if key in seen:
+                raise RuntimeError(f"Rota duplicada registrada: {method} {route.path}")
+            seen.add(key)
+
+
+assert_unique_routes(app)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -3,9 +3,15 @@ Schemas Pydantic para validação de dados da API.
 Define modelos de request/response para todas as rotas.
 """
 
+import re
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
-from pydantic import BaseModel, EmailStr, Field, field_validator, field_serializer, validator
+from pydantic import AwareDatetime, BaseModel, EmailStr, Field, field_validator
+
+from app.core.utils import now
+
+# Letras, números, _ e -
+_USERNAME_RE = re.compile(r"[A-Za-z0-9_-]+")
 
 
 def ensure_timezone(dt: Optional[datetime]) -> Optional[datetime]:
@@ -20,6 +26,29 @@ def ensure_timezone(dt: Optional[datetime]) -> Optional[datetime]:
     return dt
 
 
+def utc_datetime(cls, value: Any) -> Any:
+    """
+    Validador (mode='before') que normaliza datetimes naive do banco para UTC.
+    Com o timezone resolvido na construção, a serialização ISO 8601 fica
+    inteiramente com o pydantic-core, sem field_serializer em Python.
+    """
+    if isinstance(value, datetime):
+        return ensure_timezone(value)
+    return value
+
+
+class FastModel(BaseModel):
+    """
+    Base dos schemas de resposta que as rotas serializam direto
+    (Response com to_json_bytes), sem revalidação do response_model
+    nem jsonable_encoder.
+    """
+
+    def to_json_bytes(self) -> bytes:
+        """JSON do modelo gerado pelo pydantic-core (campos None mantidos como null)"""
+        return self.__pydantic_serializer__.to_json(self, by_alias=True)
+
+
 # ============================================================================
 # Auth Schemas
 # ============================================================================
@@ -30,10 +59,11 @@ class UserRegister(BaseModel):
     username: str = Field(..., min_length=3, max_length=50)
     password: str = Field(..., min_length=8, max_length=100)
 
-    @validator("username")
-    def username_alphanumeric(cls, v):
-        assert v.replace("_", "").replace("-", "").isalnum(), \
-            "Username deve conter apenas letras, números, _ e -"
+    @field_validator("username")
+    @classmethod
+    def username_alphanumeric(cls, v: str) -> str:
+        if not _USERNAME_RE.fullmatch(v):
+            raise ValueError("Username deve conter apenas letras, números, _ e -")
         return v
 
 
@@ -71,10 +101,10 @@ class UserResponse(BaseModel):
 # Job/Transcription Schemas
 # ============================================================================
 
-class JobStatus(BaseModel):
+class JobStatus(FastModel):
     """Status de um job de transcrição"""
     job_id: str
-    status: str  # QUEUED, PROCESSING, COMPLETED, FAILED
+    status: str  # UPLOADING, QUEUED, PROCESSING, COMPLETED, FAILED
     progress: float = Field(ge=0.0, le=1.0)
     created_at: datetime
     started_at: Optional[datetime] = None
@@ -107,7 +137,7 @@ class TranscriptionSpeaker(BaseModel):
     texts: List[str]
 
 
-class TranscriptionResponse(BaseModel):
+class TranscriptionResponse(FastModel):
     """Resposta completa com transcrição"""
     job_id: str
     filename: str
@@ -116,17 +146,10 @@ class TranscriptionResponse(BaseModel):
     duration_seconds: float
     phrases: List[TranscriptionPhrase]
     speakers: List[TranscriptionSpeaker]
-    created_at: datetime
-    completed_at: Optional[datetime]
+    created_at: AwareDatetime
+    completed_at: Optional[AwareDatetime]
 
-    @field_serializer('created_at', 'completed_at', when_used='always')
-    def serialize_datetime(self, dt: Optional[datetime]) -> Optional[str]:
-        if dt is None:
-            return None
-        # Adicionar timezone se não tiver
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.isoformat()
+    normalize_timezone = field_validator('created_at', 'completed_at', mode='before')(utc_datetime)
 
 
 class TranscriptionListItem(BaseModel):
@@ -136,26 +159,21 @@ class TranscriptionListItem(BaseModel):
     status: str
     progress: float
     duration_seconds: Optional[float]
-    created_at: datetime
-    completed_at: Optional[datetime]
+    created_at: AwareDatetime
+    completed_at: Optional[AwareDatetime]
 
-    @field_serializer('created_at', 'completed_at', when_used='always')
-    def serialize_datetime(self, dt: Optional[datetime]) -> Optional[str]:
-        if dt is None:
-            return None
-        # Adicionar timezone se não tiver
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.isoformat()
+    normalize_timezone = field_validator('created_at', 'completed_at', mode='before')(utc_datetime)
 
 
-class TranscriptionListResponse(BaseModel):
+class TranscriptionListResponse(FastModel):
     """Lista paginada de transcrições"""
     items: List[TranscriptionListItem]
-    total: int
     page: int
     page_size: int
-    total_pages: int
+    has_more: bool
+    next_cursor: Optional[str] = None  # Opaco: passar como ?cursor= para a próxima página
+    total: Optional[int] = None  # Só com ?include_total=true
+    total_pages: Optional[int] = None
 
 
 # ============================================================================
@@ -180,7 +198,7 @@ class ChatResponse(BaseModel):
     answer: str
     sources: List[Dict[str, Any]]  # Chunks usados como contexto
     job_id: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: AwareDatetime = Field(default_factory=now)
 
 
 # ============================================================================
@@ -201,7 +219,7 @@ class UpdateTranscriptionResponse(BaseModel):
     """Resposta de atualização"""
     job_id: str
     message: str
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: AwareDatetime = Field(default_factory=now)
 
 
 # ============================================================================
@@ -212,7 +230,7 @@ class SummaryResponse(BaseModel):
     """Resposta com resumo"""
     job_id: str
     summary: str
-    generated_at: datetime = Field(default_factory=datetime.utcnow)
+    generated_at: AwareDatetime = Field(default_factory=now)
     cached: bool = False  # Se foi carregado do cache
 
 
@@ -253,7 +271,7 @@ class MeetingMinutesResponse(BaseModel):
     """Resposta com ata de reunião"""
     job_id: str
     meeting_minutes: MeetingMinutesData
-    generated_at: datetime = Field(default_factory=datetime.utcnow)
+    generated_at: AwareDatetime = Field(default_factory=now)
     cached: bool = False
 
 
@@ -294,14 +312,14 @@ class HealthResponse(BaseModel):
     """Status de saúde da aplicação"""
     status: str
     version: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: AwareDatetime = Field(default_factory=now)
 
 
 class ReadinessResponse(BaseModel):
     """Status de prontidão da aplicação"""
     ready: bool
     services: Dict[str, bool]  # redis, database, etc.
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: AwareDatetime = Field(default_factory=now)
 
 
 # ============================================================================
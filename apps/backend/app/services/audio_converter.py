@@ -3,14 +3,21 @@ Serviço de conversão de áudio para formatos compatíveis com Azure Speech.
 Usa FFmpeg para converter qualquer formato de áudio/vídeo para WAV.
 """
 
+import functools
+import shutil
 import subprocess
 import tempfile
+import threading
 import os
 from pathlib import Path
-from typing import BinaryIO, Tuple
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
 from loguru import logger
 
 
+class ConversionBusyError(Exception):
+    """Todas as vagas de conversão ficaram ocupadas além do tempo de espera"""
+
+
 class AudioConverterService:
     """Serviço para converter áudios para formato compatível com Azure Speech"""
 
@@ -21,24 +28,63 @@ class AudioConverterService:
     CHANNELS = 1
     AUDIO_CODEC = "pcm_s16le"  # 16-bit PCM
 
+    # Argumentos de saída do FFmpeg, montados uma única vez
+    WAV_OUTPUT_ARGS: Tuple[str, ...] = (
+        "-ar", str(SAMPLE_RATE),    # Sample rate
+        "-ac", str(CHANNELS),       # Canais (mono)
+        "-acodec", AUDIO_CODEC,     # Codec de áudio
+        "-y",                       # Sobrescrever output
+    )
+
+    # Containers com o índice (moov) no fim do arquivo: o FFmpeg precisa de
+    # seek na entrada, então esses formatos ainda passam por arquivo temporário
+    SEEKABLE_INPUT_EXTENSIONS = frozenset({".mp4", ".m4a", ".m4v", ".mov", ".3gp"})
+    PIPE_CHUNK_SIZE = 1024 * 1024  # 1 MB
+    TIMEOUT_SECONDS = 300  # 5 minutos max
+
+    # Processos FFmpeg simultâneos por processo da API (cada um usa CPU e
+    # dezenas de MB); acima disso as conversões esperam até QUEUE_TIMEOUT_SECONDS
+    MAX_CONCURRENT_CONVERSIONS = os.cpu_count() or 1
+    QUEUE_TIMEOUT_SECONDS = 60
+
+    def __init__(self):
+        self._conversion_slots = threading.BoundedSemaphore(self.MAX_CONCURRENT_CONVERSIONS)
+
     def convert_to_wav(
         self,
         input_file: BinaryIO,
         input_filename: str
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[str, str]:
         """
         Converte qualquer arquivo de áudio/vídeo para WAV compatível com Azure Speech.
 
+        A entrada é enviada em blocos ao stdin do FFmpeg (sem cópia em disco,
+        exceto para containers que exigem seek) e a saída fica em disco, para
+        que arquivos grandes não sejam carregados inteiros em memória.
+
         Args:
-            input_file: Arquivo de entrada (BytesIO ou similar)
+            input_file: Arquivo de entrada (file-like, posicionado no início)
             input_filename: Nome original do arquivo (para detectar extensão)
 
         Returns:
-            Tuple[bytes, str]: (conteúdo WAV em bytes, novo nome do arquivo)
+            Tuple[str, str]: (caminho do WAV temporário, novo nome do arquivo).
+            O chamador deve remover o arquivo temporário.
 
         Raises:
+            ConversionBusyError: Se não houver vaga de conversão dentro do tempo de espera
             Exception: Se a conversão falhar
         """
+        if not self._conversion_slots.acquire(timeout=self.QUEUE_TIMEOUT_SECONDS):
+            logger.warning(f"Sem vaga para converter {input_filename} após {self.QUEUE_TIMEOUT_SECONDS}s")
+            raise ConversionBusyError("Muitas conversões de áudio em andamento")
+
+        try:
+            return self._convert_to_wav(input_file, input_filename)
+        finally:
+            self._conversion_slots.release()
+
+    def _convert_to_wav(self, input_file: BinaryIO, input_filename: str) -> Tuple[str, str]:
+        """Conversão em si (chamada com uma vaga de conversão reservada)"""
         input_ext = Path(input_filename).suffix.lower()
         output_filename = Path(input_filename).stem + ".wav"
 
@@ -47,13 +93,14 @@ class AudioConverterService:
             f"({self.SAMPLE_RATE}Hz, {self.CHANNELS} canal)"
         )
 
-        # Criar arquivos temporários
-        with tempfile.NamedTemporaryFile(
-            suffix=input_ext,
-            delete=False
-        ) as temp_input:
-            temp_input_path = temp_input.name
-            temp_input.write(input_file.read())
+        temp_input_path = None
+        if input_ext in self.SEEKABLE_INPUT_EXTENSIONS:
+            with tempfile.NamedTemporaryFile(
+                suffix=input_ext,
+                delete=False
+            ) as temp_input:
+                temp_input_path = temp_input.name
+                shutil.copyfileobj(input_file, temp_input)
 
         output_path = tempfile.mktemp(suffix=".wav")
 
@@ -61,60 +108,106 @@ class AudioConverterService:
             # Executar FFmpeg
             command = [
                 "ffmpeg",
-                "-i", temp_input_path,           # Arquivo de entrada
-                "-ar", str(self.SAMPLE_RATE),    # Sample rate
-                "-ac", str(self.CHANNELS),       # Canais (mono)
-                "-acodec", self.AUDIO_CODEC,     # Codec de áudio
-                "-y",                             # Sobrescrever output
-                output_path                       # Arquivo de saída
+                "-i", temp_input_path or "pipe:0",  # Arquivo de entrada (ou stdin)
+                *self.WAV_OUTPUT_ARGS,
+                output_path                          # Arquivo de saída
             ]
 
-            logger.debug(f"Executando comando: {' '.join(command)}")
+            logger.opt(lazy=True).debug("Executando comando: {}", lambda: " ".join(command))
 
-            result = subprocess.run(
+            returncode, stderr = self._run_ffmpeg(
                 command,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minutos max
+                None if temp_input_path else input_file
             )
 
-            if result.returncode != 0:
-                logger.error(f"FFmpeg stderr: {result.stderr}")
-                raise Exception(f"Erro na conversão FFmpeg: {result.stderr}")
-
-            # Ler arquivo convertido
-            with open(output_path, "rb") as f:
-                wav_content = f.read()
+            if returncode != 0:
+                logger.error(f"FFmpeg stderr: {stderr}")
+                raise Exception(f"Erro na conversão FFmpeg: {stderr}")
 
-            original_size = os.path.getsize(temp_input_path)
-            converted_size = len(wav_content)
+            converted_size = os.path.getsize(output_path)
 
             logger.info(
                 f"Conversão concluída: {input_filename} -> {output_filename} "
-                f"({original_size / 1024:.2f}KB -> {converted_size / 1024:.2f}KB)"
+                f"({converted_size / 1024:.2f}KB)"
             )
 
-            return wav_content, output_filename
+            return output_path, output_filename
 
         except subprocess.TimeoutExpired:
             logger.error("Timeout na conversão de áudio")
+            self._remove_file(output_path)
             raise Exception("Conversão de áudio excedeu tempo limite de 5 minutos")
 
         except Exception as e:
             logger.error(f"Erro na conversão de áudio: {str(e)}")
+            self._remove_file(output_path)
+            raise
+
+        finally:
+            # Limpar arquivo temporário de entrada
+            if temp_input_path:
+                self._remove_file(temp_input_path)
+
+    def _run_ffmpeg(
+        self,
+        command: List[str],
+        input_file: Optional[BinaryIO] = None
+    ) -> Tuple[int, str]:
+        """
+        Executa o FFmpeg, enviando input_file (se houver) ao stdin em blocos.
+
+        O stderr é drenado em uma thread para o processo não travar com o pipe cheio.
+
+        Returns:
+            Tuple[int, str]: (código de saída, stderr)
+
+        Raises:
+            subprocess.TimeoutExpired: Se exceder TIMEOUT_SECONDS (o processo é encerrado)
+        """
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE if input_file is not None else subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            bufsize=0
+        )
+
+        stderr_chunks: List[bytes] = []
+        stderr_reader = threading.Thread(
+            target=lambda: stderr_chunks.append(process.stderr.read()),
+            daemon=True
+        )
+        stderr_reader.start()
+
+        try:
+            if input_file is not None:
+                try:
+                    shutil.copyfileobj(input_file, process.stdin, self.PIPE_CHUNK_SIZE)
+                except BrokenPipeError:
+                    # FFmpeg encerrou antes de ler toda a entrada; o motivo vem no stderr
+                    pass
+                finally:
+                    process.stdin.close()
+
+            process.wait(timeout=self.TIMEOUT_SECONDS)
+
+        except BaseException:
+            process.kill()
+            process.wait()
             raise
 
         finally:
-            # Limpar arquivos temporários
-            try:
-                os.unlink(temp_input_path)
-            except:
-                pass
+            stderr_reader.join()
+
+        return process.returncode, b"".join(stderr_chunks).decode(errors="replace")
 
-            try:
-                os.unlink(output_path)
-            except:
-                pass
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        """Remove um arquivo temporário, ignorando se já não existir"""
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
 
     def is_conversion_needed(self, filename: str) -> bool:
         """
@@ -133,40 +226,69 @@ class AudioConverterService:
         """
         Obtém informações sobre um arquivo de áudio usando FFprobe.
 
+        Só os campos usados são pedidos ao ffprobe (saída chave=valor, sem JSON),
+        e o resultado fica em cache enquanto o arquivo não mudar.
+
         Args:
             file_path: Caminho do arquivo
 
         Returns:
-            Dict com informações do áudio (duração, codec, sample_rate, etc.)
+            Dict com informações do primeiro stream de áudio (duration,
+            codec_name, sample_rate, channels); vazio se o ffprobe falhar
         """
         try:
-            command = [
-                "ffprobe",
-                "-v", "quiet",
-                "-print_format", "json",
-                "-show_format",
-                "-show_streams",
-                file_path
-            ]
-
-            result = subprocess.run(
-                command,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-
-            if result.returncode == 0:
-                import json
-                return json.loads(result.stdout)
-            else:
-                logger.warning(f"Erro ao obter info do áudio: {result.stderr}")
-                return {}
+            stat = os.stat(file_path)
+            return dict(_probe_audio(file_path, stat.st_mtime_ns, stat.st_size))
 
         except Exception as e:
-            logger.error(f"Erro ao executar ffprobe: {str(e)}")
+            logger.warning(f"Erro ao obter info do áudio: {str(e)}")
             return {}
 
 
+# Conversão dos campos retornados por _probe_audio
+_PROBE_FIELDS = {
+    "duration": float,
+    "codec_name": str,
+    "sample_rate": int,
+    "channels": int,
+}
+
+
+@functools.lru_cache(maxsize=128)
+def _probe_audio(file_path: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    """
+    Executa o ffprobe (cache por caminho, mtime e tamanho do arquivo).
+
+    Raises:
+        Exception: Se o ffprobe falhar (falhas não ficam em cache)
+    """
+    command = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "format=duration:stream=codec_name,sample_rate,channels",
+        "-of", "default=noprint_wrappers=1",
+        file_path
+    ]
+
+    # Saída em bytes: o stderr só é decodificado em caso de erro
+    result = subprocess.run(
+        command,
+        capture_output=True,
+        timeout=30
+    )
+
+    if result.returncode != 0:
+        raise Exception(result.stderr.decode(errors="replace"))
+
+    info = {}
+    for line in result.stdout.decode().splitlines():
+        key, sep, value = line.partition("=")
+        if sep and key in _PROBE_FIELDS and value != "N/A":
+            info[key] = _PROBE_FIELDS[key](value)
+
+    return info
+
+
 # Instância global do serviço
 audio_converter_service = AudioConverterService()
@@ -6,48 +6,253 @@ Fornece funcionalidades de:
 - Chat/RAG sobre conteúdo transcrito
 """
 
-from typing import List, Dict, Any, Optional
-from openai import AzureOpenAI
+import functools
+import hashlib
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, BinaryIO
+import httpx
+import numpy as np
+from cachetools import LRUCache
+from openai import APIConnectionError, AzureOpenAI, InternalServerError, RateLimitError, Stream
+from openai.types.chat import ChatCompletionChunk
+from pydantic import ValidationError
 from loguru import logger
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 from docx import Document
+from docx.document import Document as DocxDocument
 from docx.shared import Pt, RGBColor, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from io import BytesIO
 from datetime import datetime
 
 from app.core.config import settings
+from app.models.schemas import MeetingMinutesData
+
+
+# Política de retry das chamadas ao Azure OpenAI, montada uma vez: só falhas
+# transitórias (rate limit, conexão/timeout, 5xx) são repetidas; erros de
+# requisição ou de código sobem na primeira tentativa
+openai_retry = retry(
+    retry=retry_if_exception_type((RateLimitError, APIConnectionError, InternalServerError)),
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    reraise=True
+)
+
+
+# Tamanhos, cores e margens dos documentos .docx (objetos imutáveis,
+# criados uma vez e reaproveitados em todas as linhas/células)
+_FONT_9, _FONT_10, _FONT_11, _FONT_12, _FONT_16, _FONT_18, _FONT_20 = (
+    Pt(size) for size in (9, 10, 11, 12, 16, 18, 20)
+)
+_COLOR_NAVY = RGBColor(0, 51, 102)
+_COLOR_BLUE = RGBColor(0, 102, 204)
+_COLOR_TEAL = RGBColor(0, 102, 153)
+_COLOR_GREY = RGBColor(128, 128, 128)
+_MARGIN = Inches(1)
+
+
+def _add_summary_heading(doc: DocxDocument, line: str) -> None:
+    # Título de seção (## ...)
+    section_heading = doc.add_heading(line.replace('##', '').strip(), level=2)
+    section_heading.runs[0].font.color.rgb = _COLOR_BLUE
+
+
+def _add_summary_label(doc: DocxDocument, line: str) -> None:
+    # Possível título de seção (linha curta terminada em :)
+    p = doc.add_paragraph(line)
+    p.runs[0].font.bold = True
+    p.runs[0].font.size = _FONT_12
+    p.runs[0].font.color.rgb = _COLOR_NAVY
+
+
+def _add_summary_bullet(doc: DocxDocument, line: str) -> None:
+    # Item de lista
+    p = doc.add_paragraph(line.lstrip('- •').strip(), style='List Bullet')
+    p.runs[0].font.size = _FONT_11
+
+
+def _add_summary_italic(doc: DocxDocument, line: str) -> None:
+    # Texto em itálico (*...*)
+    p = doc.add_paragraph(line.strip('*').strip())
+    p.runs[0].font.italic = True
+    p.runs[0].font.size = _FONT_11
+
+
+def _add_summary_body(doc: DocxDocument, line: str) -> None:
+    # Parágrafo normal
+    p = doc.add_paragraph(line)
+    p.runs[0].font.size = _FONT_11
+    p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+
+
+def _add_summary_blank(doc: DocxDocument, line: str) -> None:
+    doc.add_paragraph()
+
+
+# Classificação das linhas do resumo em um único match; a ordem das
+# alternativas é a prioridade (título, rótulo < 80 chars, lista, itálico)
+_SUMMARY_LINE_RE = re.compile(
+    r"(?P<heading>##.*)"
+    r"|(?P<label>.{0,78}:)"
+    r"|(?P<bullet>[-•] .*)"
+    r"|(?P<italic>\*(?:.*\*)?)"
+    r"|(?P<body>.+)"
+    r"|(?P<blank>)"
+)
+_SUMMARY_LINE_HANDLERS = {
+    'heading': _add_summary_heading,
+    'label': _add_summary_label,
+    'bullet': _add_summary_bullet,
+    'italic': _add_summary_italic,
+    'body': _add_summary_body,
+    'blank': _add_summary_blank,
+}
+
+
+# Prompts de sistema fixos: montados uma vez e idênticos byte a byte entre
+# requisições (prefixo estável para o cache de prompts do Azure OpenAI)
+SUMMARY_SYSTEM_PROMPT = """Você é um assistente especializado em resumir transcrições de áudio.
+Crie resumos DETALHADOS, informativos e bem estruturados.
+
+Diretrizes:
+- Use linguagem clara e objetiva
+- Crie um resumo COMPLETO e DETALHADO, não apenas os pontos principais
+- Organize em seções com títulos quando apropriado
+- Inclua todos os tópicos importantes discutidos
+- Mantenha a ordem cronológica quando relevante
+- Use bullet points para listar itens
+- Destaque decisões, ações e próximos passos
+- Identifique os participantes quando mencionados
+- Inclua contexto e detalhes relevantes
+- Seja neutro e factual"""
+
+ANSWER_SYSTEM_PROMPT = """Você é um assistente que responde perguntas sobre transcrições de áudio.
+
+Regras importantes:
+- Responda APENAS com base no contexto fornecido
+- Se a informação não estiver no contexto, diga "Não encontrei essa informação na transcrição"
+- Seja conciso e direto
+- Cite trechos relevantes quando apropriado
+- Mantenha um tom profissional e amigável
+- Se houver múltiplos speakers mencionados, identifique-os na resposta"""
+
+TITLE_SYSTEM_PROMPT = "Você é um assistente que cria títulos descritivos e concisos."
+
+MEETING_MINUTES_SYSTEM_PROMPT = """Você é um assistente especializado em criar atas de reunião profissionais DETALHADAS.
+Analise transcrições e gere atas estruturadas, organizadas e COMPLETAS com TODOS os detalhes relevantes.
+
+IMPORTANTE: Sua resposta deve ser um JSON válido com a seguinte estrutura:
+{
+    "title": "Título descritivo da reunião",
+    "summary": "Resumo executivo DETALHADO em 4-6 sentenças cobrindo os principais pontos e contexto",
+    "topics": [
+        {"topic": "Nome do tópico", "discussion": "Descrição DETALHADA da discussão com contexto completo, pontos levantados e conclusões"}
+    ],
+    "action_items": [
+        {"item": "Descrição DETALHADA da ação com contexto e objetivo", "responsible": "Nome ou 'A definir'", "deadline": "Data ou 'A definir'"}
+    ],
+    "decisions": ["Decisão tomada com contexto e justificativa"],
+    "next_steps": ["Próximo passo com detalhes de execução"]
+}
+
+Diretrizes:
+- Crie atas COMPLETAS e DETALHADAS, não resumidas
+- Identifique TODOS os itens de ação mencionados com descrições completas
+- Extraia TODAS as decisões importantes com contexto
+- Liste TODOS os próximos passos discutidos com detalhes
+- Para cada tópico, inclua discussão DETALHADA com todos os pontos relevantes
+- Use linguagem clara, profissional e descritiva
+- Mantenha a ordem cronológica dos tópicos quando relevante
+- Inclua contexto e justificativas para decisões e ações
+- Identifique os participantes quando mencionados
+- Se não houver informação para uma seção, use array vazio []
+- Se responsável ou prazo não foram mencionados, use "A definir"
+- Retorne APENAS o JSON, sem texto adicional"""
 
 
 class AzureOpenAIService:
     """Cliente para Azure OpenAI Service"""
 
+    # Pool HTTP do cliente: comporta os batches de embeddings em paralelo
+    # e as chamadas de chat simultâneas sem abrir conexão nova a cada requisição;
+    # com HTTP/2 as requisições são multiplexadas na mesma conexão
+    HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+    HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+    EMBEDDING_CACHE_SIZE = 2048
+    # Orçamento de caracteres por requisição de embeddings (~7500 tokens a
+    # ~4 caracteres por token, abaixo do limite de 8191 do modelo)
+    EMBEDDING_BATCH_MAX_CHARS = 30000
+
     def __init__(self):
-        self.client = AzureOpenAI(
+        self.chat_deployment = settings.AZURE_OPENAI_DEPLOYMENT
+        self.embedding_deployment = settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT
+        # Threads criadas sob demanda (seguro com o fork dos workers Celery)
+        self.embedding_executor = ThreadPoolExecutor(
+            max_workers=settings.AZURE_OPENAI_EMBEDDING_CONCURRENCY,
+            thread_name_prefix="embeddings"
+        )
+        # Embeddings de textos avulsos (queries do chat): ~6 KB por entrada
+        self._embedding_cache: LRUCache = LRUCache(maxsize=self.EMBEDDING_CACHE_SIZE)
+        self._embedding_cache_lock = threading.Lock()
+
+    @functools.cached_property
+    def client(self) -> AzureOpenAI:
+        """
+        Cliente Azure OpenAI, criado no primeiro uso.
+
+        Processos que nunca chamam o Azure OpenAI não montam o cliente, e os
+        workers Celery (prefork) criam o pool de conexões depois do fork, em
+        vez de herdar sockets do processo pai.
+        """
+        return AzureOpenAI(
             api_key=settings.AZURE_OPENAI_KEY,
             api_version=settings.AZURE_OPENAI_API_VERSION,
-            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT
+            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+            http_client=httpx.Client(
+                http2=True,
+                limits=self.HTTP_LIMITS,
+                timeout=self.HTTP_TIMEOUT
+            )
         )
-        self.chat_deployment = settings.AZURE_OPENAI_DEPLOYMENT
-        self.embedding_deployment = settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10)
-    )
-    def generate_embeddings(self, text: str) -> List[float]:
+    def generate_embeddings(self, text: str) -> np.ndarray:
         """
         Gera embeddings para um texto usando text-embedding-ada-002.
 
+        Resultados ficam em um LRU do processo (chave: SHA-256 do deployment
+        + texto), então perguntas repetidas no chat não voltam ao Azure.
+
         Args:
             text: Texto para gerar embeddings (max ~8000 tokens)
 
         Returns:
-            Lista de floats representando o vetor de embedding (1536 dimensões)
+            Vetor float32 somente leitura (1536 dimensões)
 
         Raises:
             Exception: Se a chamada à API falhar
         """
+        key = hashlib.sha256(f"{self.embedding_deployment}\0{text}".encode()).digest()
+
+        with self._embedding_cache_lock:
+            embedding = self._embedding_cache.get(key)
+        if embedding is not None:
+            logger.debug("Embedding carregado do cache")
+            return embedding
+
+        embedding = np.asarray(self._embed_text(text), dtype=np.float32)
+        embedding.setflags(write=False)
+
+        with self._embedding_cache_lock:
+            self._embedding_cache[key] = embedding
+
+        return embedding
+
+    @openai_retry
+    def _embed_text(self, text: str) -> List[float]:
+        """Gera o embedding de um texto (uma requisição à API)"""
         try:
             logger.debug(f"Gerando embeddings para texto de {len(text)} caracteres")
 
@@ -69,47 +274,104 @@ class AzureOpenAIService:
     def generate_embeddings_batch(
         self,
         texts: List[str],
-        batch_size: int = 16
-    ) -> List[List[float]]:
+        batch_size: int = 16,
+        max_chars: Optional[int] = None
+    ) -> np.ndarray:
         """
         Gera embeddings para múltiplos textos em batch.
 
+        Textos repetidos são enviados uma única vez. Cada batch é fechado ao
+        atingir batch_size textos ou max_chars caracteres, o que vier
+        primeiro. Os batches são enviados
+        em paralelo, limitados por AZURE_OPENAI_EMBEDDING_CONCURRENCY (pool
+        compartilhado pelo processo, para que vários jobs simultâneos não
+        multipliquem as requisições).
+
         Args:
             texts: Lista de textos
-            batch_size: Tamanho do batch (default: 16)
+            batch_size: Máximo de textos por batch (default: 16, limite do Azure)
+            max_chars: Máximo de caracteres por batch
+                (default: EMBEDDING_BATCH_MAX_CHARS)
 
         Returns:
-            Lista de embeddings na mesma ordem dos textos
+            Matriz float32 (len(texts) x dimensão) com os embeddings na mesma
+            ordem dos textos, pronta para o FAISS
         """
-        embeddings = []
+        # Posição de cada texto único (dict preserva a ordem da primeira ocorrência)
+        unique_texts = list(dict.fromkeys(texts))
+        positions = {text: position for position, text in enumerate(unique_texts)}
+
+        batches = list(self._pack_batches(
+            unique_texts, batch_size, max_chars or self.EMBEDDING_BATCH_MAX_CHARS
+        ))
+
+        if len(batches) == 1:
+            results = [self._embed_batch(batches[0], 1)]
+        else:
+            # map preserva a ordem dos batches e propaga o primeiro erro
+            results = self.embedding_executor.map(
+                self._embed_batch, batches, range(1, len(batches) + 1)
+            )
 
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
+        # Matriz alocada uma vez (no primeiro batch, quando a dimensão é conhecida)
+        # e preenchida por fatias, sem lista intermediária de todos os vetores
+        embeddings = np.empty((0, 0), dtype=np.float32)
+        offset = 0
+        for batch_embeddings in results:
+            if offset == 0:
+                embeddings = np.empty((len(unique_texts), len(batch_embeddings[0])), dtype=np.float32)
+            embeddings[offset:offset + len(batch_embeddings)] = batch_embeddings
+            offset += len(batch_embeddings)
+
+        if len(unique_texts) < len(texts):
+            # Espalhar os vetores de volta para as posições originais
+            logger.debug(f"{len(texts) - len(unique_texts)} textos repetidos reaproveitados")
+            embeddings = embeddings[[positions[text] for text in texts]]
 
-            try:
-                response = self.client.embeddings.create(
-                    input=batch,
-                    model=self.embedding_deployment
-                )
+        return embeddings
+
+    @staticmethod
+    def _pack_batches(texts: List[str], max_items: int, max_chars: int) -> Iterator[List[str]]:
+        """
+        Agrupa os textos em batches sequenciais respeitando os dois limites.
+
+        Um texto que sozinho excede max_chars vai em um batch próprio.
+        """
+        batch: List[str] = []
+        batch_chars = 0
+        for text in texts:
+            if batch and (len(batch) >= max_items or batch_chars + len(text) > max_chars):
+                yield batch
+                batch = []
+                batch_chars = 0
+            batch.append(text)
+            batch_chars += len(text)
+        if batch:
+            yield batch
+
+    @openai_retry
+    def _embed_batch(self, batch: List[str], batch_number: int) -> List[List[float]]:
+        """Gera os embeddings de um batch (uma requisição à API)"""
+        try:
+            response = self.client.embeddings.create(
+                input=batch,
+                model=self.embedding_deployment
+            )
 
-                batch_embeddings = [item.embedding for item in response.data]
-                embeddings.extend(batch_embeddings)
+            batch_embeddings = [item.embedding for item in response.data]
 
-                logger.debug(
-                    f"Batch {i // batch_size + 1}: "
-                    f"{len(batch_embeddings)} embeddings gerados"
-                )
+            logger.debug(
+                f"Batch {batch_number}: "
+                f"{len(batch_embeddings)} embeddings gerados"
+            )
 
-            except Exception as e:
-                logger.error(f"Erro no batch {i // batch_size + 1}: {str(e)}")
-                raise
+            return batch_embeddings
 
-        return embeddings
+        except Exception as e:
+            logger.error(f"Erro no batch {batch_number}: {str(e)}")
+            raise
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10)
-    )
+    @openai_retry
     def summarize(
         self,
         transcript: str,
@@ -127,21 +389,6 @@ class AzureOpenAIService:
         Returns:
             Resumo em linguagem natural
         """
-        system_prompt = """Você é um assistente especializado em resumir transcrições de áudio.
-Crie resumos DETALHADOS, informativos e bem estruturados.
-
-Diretrizes:
-- Use linguagem clara e objetiva
-- Crie um resumo COMPLETO e DETALHADO, não apenas os pontos principais
-- Organize em seções com títulos quando apropriado
-- Inclua todos os tópicos importantes discutidos
-- Mantenha a ordem cronológica quando relevante
-- Use bullet points para listar itens
-- Destaque decisões, ações e próximos passos
-- Identifique os participantes quando mencionados
-- Inclua contexto e detalhes relevantes
-- Seja neutro e factual"""
-
         user_prompt = f"""Por favor, crie um resumo DETALHADO e COMPLETO da seguinte transcrição.
 O resumo deve cobrir todos os tópicos importantes discutidos, não apenas um overview.
 
@@ -157,7 +404,7 @@ Resumo Detalhado:"""
             response = self.client.chat.completions.create(
                 model=self.chat_deployment,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
                     {"role": "user", "content": user_prompt}
                 ],
                 max_tokens=max_tokens,
@@ -174,10 +421,39 @@ Resumo Detalhado:"""
             logger.error(f"Erro ao gerar resumo: {str(e)}")
             raise
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10)
-    )
+    @staticmethod
+    def _build_answer_messages(
+        question: str,
+        context_chunks: List[str],
+        chat_history: Optional[List[Dict[str, str]]] = None
+    ) -> List[Dict[str, str]]:
+        """Monta as mensagens do chat RAG (sistema, histórico, contexto + pergunta)"""
+        # Concatenar contexto
+        context = "\n\n".join(
+            f"[Trecho {i}]\n{chunk}"
+            for i, chunk in enumerate(context_chunks, 1)
+        )
+
+        # Construir mensagens
+        messages = [{"role": "system", "content": ANSWER_SYSTEM_PROMPT}]
+
+        # Adicionar histórico se existir
+        if chat_history:
+            messages.extend(chat_history)
+
+        # Adicionar contexto e pergunta
+        user_message = f"""Contexto da transcrição:
+{context}
+
+Pergunta: {question}
+
+Resposta:"""
+
+        messages.append({"role": "user", "content": user_message})
+
+        return messages
+
+    @openai_retry
     def answer_question(
         self,
         question: str,
@@ -199,38 +475,7 @@ Resumo Detalhado:"""
         Returns:
             Resposta à pergunta baseada no contexto
         """
-        # Concatenar contexto
-        context = "\n\n".join([
-            f"[Trecho {i+1}]\n{chunk}"
-            for i, chunk in enumerate(context_chunks)
-        ])
-
-        system_prompt = """Você é um assistente que responde perguntas sobre transcrições de áudio.
-
-Regras importantes:
-- Responda APENAS com base no contexto fornecido
-- Se a informação não estiver no contexto, diga "Não encontrei essa informação na transcrição"
-- Seja conciso e direto
-- Cite trechos relevantes quando apropriado
-- Mantenha um tom profissional e amigável
-- Se houver múltiplos speakers mencionados, identifique-os na resposta"""
-
-        # Construir mensagens
-        messages = [{"role": "system", "content": system_prompt}]
-
-        # Adicionar histórico se existir
-        if chat_history:
-            messages.extend(chat_history)
-
-        # Adicionar contexto e pergunta
-        user_message = f"""Contexto da transcrição:
-{context}
-
-Pergunta: {question}
-
-Resposta:"""
-
-        messages.append({"role": "user", "content": user_message})
+        messages = self._build_answer_messages(question, context_chunks, chat_history)
 
         try:
             logger.info(f"Respondendo pergunta: {question[:100]}...")
@@ -252,6 +497,64 @@ Resposta:"""
             logger.error(f"Erro ao responder pergunta: {str(e)}")
             raise
 
+    def answer_question_stream(
+        self,
+        question: str,
+        context_chunks: List[str],
+        chat_history: Optional[List[Dict[str, str]]] = None,
+        max_tokens: int = 300,
+        temperature: float = 0.7
+    ) -> Iterator[str]:
+        """
+        Versão em streaming de answer_question: devolve os trechos da resposta
+        à medida que o modelo os gera (o primeiro chega bem antes da resposta completa).
+
+        A requisição é aberta (com retry) na chamada, antes do primeiro trecho;
+        falhas no meio do stream são propagadas pelo iterador.
+
+        Args:
+            question: Pergunta do usuário
+            context_chunks: Lista de chunks relevantes recuperados do FAISS
+            chat_history: Histórico de mensagens anteriores (opcional)
+            max_tokens: Número máximo de tokens na resposta
+            temperature: Criatividade da resposta
+
+        Returns:
+            Iterador com os trechos de texto da resposta
+        """
+        messages = self._build_answer_messages(question, context_chunks, chat_history)
+
+        logger.info(f"Respondendo pergunta (stream): {question[:100]}...")
+
+        stream = self._create_chat_stream(messages, max_tokens, temperature)
+
+        def deltas() -> Iterator[str]:
+            try:
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                # Cliente desconectado no meio: liberar a conexão do pool
+                stream.response.close()
+
+        return deltas()
+
+    @openai_retry
+    def _create_chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float
+    ) -> Stream[ChatCompletionChunk]:
+        """Abre uma chat completion em streaming (uma requisição à API)"""
+        return self.client.chat.completions.create(
+            model=self.chat_deployment,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+
     def generate_title(self, transcript_preview: str, max_tokens: int = 20) -> str:
         """
         Gera um título descritivo para a transcrição.
@@ -263,8 +566,6 @@ Resposta:"""
         Returns:
             Título sugerido
         """
-        system_prompt = "Você é um assistente que cria títulos descritivos e concisos."
-
         user_prompt = f"""Com base no início desta transcrição, sugira um título curto e descritivo:
 
 {transcript_preview[:500]}
@@ -275,7 +576,7 @@ Título:"""
             response = self.client.chat.completions.create(
                 model=self.chat_deployment,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": TITLE_SYSTEM_PROMPT},
                     {"role": "user", "content": user_prompt}
                 ],
                 max_tokens=max_tokens,
@@ -292,16 +593,13 @@ Título:"""
             logger.error(f"Erro ao gerar título: {str(e)}")
             return "Transcrição sem título"
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10)
-    )
+    @openai_retry
     def generate_meeting_minutes(
         self,
         transcript: str,
         max_tokens: int = 3000,
         temperature: float = 0.3
-    ) -> Dict[str, Any]:
+    ) -> MeetingMinutesData:
         """
         Gera uma ata de reunião DETALHADA e estruturada a partir de uma transcrição.
 
@@ -311,7 +609,7 @@ Título:"""
             temperature: Criatividade (0.0 = determinístico, 1.0 = criativo)
 
         Returns:
-            Dict com a estrutura da ata:
+            Ata validada (JSON do modelo parseado e validado em uma passada):
             {
                 "title": str,
                 "summary": str,
@@ -321,37 +619,6 @@ Título:"""
                 "next_steps": [str]
             }
         """
-        system_prompt = """Você é um assistente especializado em criar atas de reunião profissionais DETALHADAS.
-Analise transcrições e gere atas estruturadas, organizadas e COMPLETAS com TODOS os detalhes relevantes.
-
-IMPORTANTE: Sua resposta deve ser um JSON válido com a seguinte estrutura:
-{
-    "title": "Título descritivo da reunião",
-    "summary": "Resumo executivo DETALHADO em 4-6 sentenças cobrindo os principais pontos e contexto",
-    "topics": [
-        {"topic": "Nome do tópico", "discussion": "Descrição DETALHADA da discussão com contexto completo, pontos levantados e conclusões"}
-    ],
-    "action_items": [
-        {"item": "Descrição DETALHADA da ação com contexto e objetivo", "responsible": "Nome ou 'A definir'", "deadline": "Data ou 'A definir'"}
-    ],
-    "decisions": ["Decisão tomada com contexto e justificativa"],
-    "next_steps": ["Próximo passo com detalhes de execução"]
-}
-
-Diretrizes:
-- Crie atas COMPLETAS e DETALHADAS, não resumidas
-- Identifique TODOS os itens de ação mencionados com descrições completas
-- Extraia TODAS as decisões importantes com contexto
-- Liste TODOS os próximos passos discutidos com detalhes
-- Para cada tópico, inclua discussão DETALHADA com todos os pontos relevantes
-- Use linguagem clara, profissional e descritiva
-- Mantenha a ordem cronológica dos tópicos quando relevante
-- Inclua contexto e justificativas para decisões e ações
-- Identifique os participantes quando mencionados
-- Se não houver informação para uma seção, use array vazio []
-- Se responsável ou prazo não foram mencionados, use "A definir"
-- Retorne APENAS o JSON, sem texto adicional"""
-
         user_prompt = f"""Por favor, gere uma ata de reunião DETALHADA e COMPLETA para a seguinte transcrição.
 A ata deve incluir TODOS os tópicos discutidos, TODAS as decisões tomadas, TODOS os itens de ação e TODOS os próximos passos.
 
@@ -365,7 +632,7 @@ Ata Detalhada (JSON):"""
             response = self.client.chat.completions.create(
                 model=self.chat_deployment,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": MEETING_MINUTES_SYSTEM_PROMPT},
                     {"role": "user", "content": user_prompt}
                 ],
                 max_tokens=max_tokens,
@@ -375,17 +642,16 @@ Ata Detalhada (JSON):"""
 
             content = response.choices[0].message.content.strip()
 
-            # Parse JSON
-            import json
-            minutes = json.loads(content)
+            # Parse e validação do JSON direto no pydantic-core
+            minutes = MeetingMinutesData.model_validate_json(content)
 
-            logger.info(f"Ata de reunião gerada com {len(minutes.get('action_items', []))} itens de ação")
+            logger.info(f"Ata de reunião gerada com {len(minutes.action_items)} itens de ação")
 
             return minutes
 
-        except json.JSONDecodeError as e:
+        except ValidationError as e:
             logger.error(f"Erro ao parsear JSON da ata: {str(e)}")
-            logger.error(f"Conteúdo recebido: {content}")
+            logger.error(f"Conteúdo recebido (truncado): {content[:512]}")
             raise ValueError("Formato inválido de ata gerada")
         except Exception as e:
             logger.error(f"Erro ao gerar ata de reunião: {str(e)}")
@@ -430,18 +696,18 @@ Ata Detalhada (JSON):"""
             # Configurar margens
             sections = doc.sections
             for section in sections:
-                section.top_margin = Inches(1)
-                section.bottom_margin = Inches(1)
-                section.left_margin = Inches(1)
-                section.right_margin = Inches(1)
+                section.top_margin = _MARGIN
+                section.bottom_margin = _MARGIN
+                section.left_margin = _MARGIN
+                section.right_margin = _MARGIN
 
             # Título
             title = doc.add_heading('Resumo Detalhado da Transcrição', 0)
             title.alignment = WD_ALIGN_PARAGRAPH.CENTER
             title_format = title.runs[0].font
-            title_format.size = Pt(18)
+            title_format.size = _FONT_18
             title_format.bold = True
-            title_format.color.rgb = RGBColor(0, 51, 102)
+            title_format.color.rgb = _COLOR_NAVY
 
             # Informações do documento
             doc.add_paragraph()
@@ -459,7 +725,7 @@ Ata Detalhada (JSON):"""
             # Estilizar células da tabela
             for row in info_table.rows:
                 for cell in row.cells:
-                    cell.paragraphs[0].runs[0].font.size = Pt(10)
+                    cell.paragraphs[0].runs[0].font.size = _FONT_10
                 row.cells[0].paragraphs[0].runs[0].font.bold = True
 
             # Espaço
@@ -468,46 +734,13 @@ Ata Detalhada (JSON):"""
             # Seção de Resumo
             heading = doc.add_heading('Resumo', level=1)
             heading_format = heading.runs[0].font
-            heading_format.color.rgb = RGBColor(0, 51, 102)
-
-            # Processar o texto do resumo
-            # Dividir em linhas e processar formatação
-            lines = summary_text.split('\n')
+            heading_format.color.rgb = _COLOR_NAVY
 
-            for line in lines:
+            # Processar o texto do resumo linha a linha
+            for line in summary_text.split('\n'):
                 line = line.strip()
-                if not line:
-                    doc.add_paragraph()
-                    continue
-
-                # Detectar se é um título (linha que termina com : ou começa com ##)
-                if line.startswith('##'):
-                    # Título de seção
-                    title_text = line.replace('##', '').strip()
-                    section_heading = doc.add_heading(title_text, level=2)
-                    section_heading.runs[0].font.color.rgb = RGBColor(0, 102, 204)
-                elif line.endswith(':') and len(line) < 80:
-                    # Possível título de seção
-                    p = doc.add_paragraph(line)
-                    p.runs[0].font.bold = True
-                    p.runs[0].font.size = Pt(12)
-                    p.runs[0].font.color.rgb = RGBColor(0, 51, 102)
-                elif line.startswith('- ') or line.startswith('• '):
-                    # Item de lista
-                    text = line.lstrip('- •').strip()
-                    p = doc.add_paragraph(text, style='List Bullet')
-                    p.runs[0].font.size = Pt(11)
-                elif line.startswith('*') and line.endswith('*'):
-                    # Texto em itálico
-                    text = line.strip('*').strip()
-                    p = doc.add_paragraph(text)
-                    p.runs[0].font.italic = True
-                    p.runs[0].font.size = Pt(11)
-                else:
-                    # Parágrafo normal
-                    p = doc.add_paragraph(line)
-                    p.runs[0].font.size = Pt(11)
-                    p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+                match = _SUMMARY_LINE_RE.fullmatch(line)
+                _SUMMARY_LINE_HANDLERS[match.lastgroup](doc, line)
 
             # Rodapé
             doc.add_paragraph()
@@ -517,9 +750,9 @@ Ata Detalhada (JSON):"""
 
             footer_text = doc.add_paragraph('Documento gerado automaticamente pelo Audia')
             footer_text.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            footer_text.runs[0].font.size = Pt(9)
+            footer_text.runs[0].font.size = _FONT_9
             footer_text.runs[0].font.italic = True
-            footer_text.runs[0].font.color.rgb = RGBColor(128, 128, 128)
+            footer_text.runs[0].font.color.rgb = _COLOR_GREY
 
             # Salvar em BytesIO
             docx_buffer = BytesIO()
@@ -537,8 +770,9 @@ Ata Detalhada (JSON):"""
     def generate_meeting_minutes_docx(
         self,
         minutes_data: Dict[str, Any],
-        filename: str
-    ) -> BytesIO:
+        filename: str,
+        output: Optional[BinaryIO] = None
+    ) -> BinaryIO:
         """
         Gera um documento .docx formatado com a ata de reunião.
 
@@ -551,9 +785,10 @@ Ata Detalhada (JSON):"""
                 - decisions: Lista de decisões
                 - next_steps: Lista de próximos passos
             filename: Nome do arquivo original da transcrição
+            output: Arquivo de saída (file-like) onde gravar o .docx (default: novo BytesIO)
 
         Returns:
-            BytesIO com o documento .docx gerado
+            Arquivo de saída com o documento .docx, posicionado no início
         """
         try:
             logger.info("Gerando documento .docx da ata de reunião")
@@ -564,26 +799,26 @@ Ata Detalhada (JSON):"""
             # Configurar margens
             sections = doc.sections
             for section in sections:
-                section.top_margin = Inches(1)
-                section.bottom_margin = Inches(1)
-                section.left_margin = Inches(1)
-                section.right_margin = Inches(1)
+                section.top_margin = _MARGIN
+                section.bottom_margin = _MARGIN
+                section.left_margin = _MARGIN
+                section.right_margin = _MARGIN
 
             # Título principal
             title = doc.add_heading('Ata de Reunião', 0)
             title.alignment = WD_ALIGN_PARAGRAPH.CENTER
             title_format = title.runs[0].font
-            title_format.size = Pt(20)
+            title_format.size = _FONT_20
             title_format.bold = True
-            title_format.color.rgb = RGBColor(0, 51, 102)
+            title_format.color.rgb = _COLOR_NAVY
 
             # Subtítulo com título da reunião
             if minutes_data.get('title'):
                 subtitle = doc.add_heading(minutes_data['title'], level=1)
                 subtitle.alignment = WD_ALIGN_PARAGRAPH.CENTER
                 subtitle_format = subtitle.runs[0].font
-                subtitle_format.size = Pt(16)
-                subtitle_format.color.rgb = RGBColor(0, 102, 153)
+                subtitle_format.size = _FONT_16
+                subtitle_format.color.rgb = _COLOR_TEAL
 
             doc.add_paragraph()
 
@@ -608,7 +843,7 @@ Ata Detalhada (JSON):"""
                 summary_para = doc.add_paragraph(minutes_data['summary'])
                 summary_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
                 for run in summary_para.runs:
-                    run.font.size = Pt(11)
+                    run.font.size = _FONT_11
                 doc.add_paragraph()
 
             # Tópicos Discutidos
@@ -618,13 +853,13 @@ Ata Detalhada (JSON):"""
                 for idx, topic in enumerate(minutes_data['topics'], 1):
                     # Título do tópico
                     topic_heading = doc.add_heading(f"{idx}. {topic.get('topic', 'Tópico sem título')}", level=2)
-                    topic_heading.runs[0].font.color.rgb = RGBColor(0, 102, 153)
+                    topic_heading.runs[0].font.color.rgb = _COLOR_TEAL
 
                     # Discussão
                     discussion_para = doc.add_paragraph(topic.get('discussion', ''))
                     discussion_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
                     for run in discussion_para.runs:
-                        run.font.size = Pt(11)
+                        run.font.size = _FONT_11
 
                     doc.add_paragraph()
 
@@ -636,7 +871,7 @@ Ata Detalhada (JSON):"""
                     p = doc.add_paragraph(decision, style='List Bullet')
                     p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
                     for run in p.runs:
-                        run.font.size = Pt(11)
+                        run.font.size = _FONT_11
 
                 doc.add_paragraph()
 
@@ -657,7 +892,7 @@ Ata Detalhada (JSON):"""
                 # Aplicar formatação ao cabeçalho
                 for cell in header_cells:
                     cell.paragraphs[0].runs[0].font.bold = True
-                    cell.paragraphs[0].runs[0].font.size = Pt(11)
+                    cell.paragraphs[0].runs[0].font.size = _FONT_11
                     cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
 
                 # Adicionar itens de ação
@@ -671,7 +906,7 @@ Ata Detalhada (JSON):"""
                     for cell in row_cells:
                         for paragraph in cell.paragraphs:
                             for run in paragraph.runs:
-                                run.font.size = Pt(10)
+                                run.font.size = _FONT_10
 
                 doc.add_paragraph()
 
@@ -683,7 +918,7 @@ Ata Detalhada (JSON):"""
                     p = doc.add_paragraph(step, style='List Bullet')
                     p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
                     for run in p.runs:
-                        run.font.size = Pt(11)
+                        run.font.size = _FONT_11
 
                 doc.add_paragraph()
 
@@ -696,12 +931,12 @@ Ata Detalhada (JSON):"""
 
             footer_text = doc.add_paragraph('Ata gerada automaticamente pelo Audia')
             footer_text.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            footer_text.runs[0].font.size = Pt(9)
+            footer_text.runs[0].font.size = _FONT_9
             footer_text.runs[0].font.italic = True
-            footer_text.runs[0].font.color.rgb = RGBColor(128, 128, 128)
+            footer_text.runs[0].font.color.rgb = _COLOR_GREY
 
-            # Salvar em BytesIO
-            docx_buffer = BytesIO()
+            # Salvar no arquivo de saída
+            docx_buffer = output if output is not None else BytesIO()
             doc.save(docx_buffer)
             docx_buffer.seek(0)
 
@@ -3,6 +3,7 @@ Serviço de integração com Azure Speech Service - Batch Transcription API.
 Suporta transcrição com diarização (identificação de speakers) e timestamps.
 """
 
+import re
 import time
 import httpx
 from typing import Dict, Any, Optional, List
@@ -11,6 +12,9 @@ from tenacity import retry, stop_after_attempt, wait_exponential
 
 from app.core.config import settings
 
+# Duração ISO 8601 retornada pelo Azure (ex.: PT1H2M3.4S)
+_DURATION_RE = re.compile(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:([\d.]+)S)?')
+
 
 class AzureSpeechService:
     """Cliente para Azure Speech Service Batch API"""
@@ -296,6 +300,10 @@ class AzureSpeechService:
         # Extrair frases com diarização
         recognized_phrases = transcription_json.get("recognizedPhrases", [])
 
+        # Índice dos speakers por id (evita busca linear a cada frase)
+        speakers_by_id: Dict[Any, Dict[str, Any]] = {}
+        full_text_parts: List[str] = []
+
         for phrase in recognized_phrases:
             speaker = phrase.get("speaker", 0)
             offset = self._parse_duration(phrase.get("offset", "PT0S"))
@@ -321,29 +329,23 @@ class AzureSpeechService:
             result["phrases"].append(phrase_data)
 
             # Agregar por speaker
-            speaker_entry = next(
-                (s for s in result["speakers"] if s["speaker_id"] == speaker),
-                None
-            )
+            speaker_entry = speakers_by_id.get(speaker)
 
-            if not speaker_entry:
+            if speaker_entry is None:
                 speaker_entry = {
                     "speaker_id": speaker,
                     "texts": []
                 }
+                speakers_by_id[speaker] = speaker_entry
                 result["speakers"].append(speaker_entry)
 
-            # Adicionar texto com prefixo do speaker
+            # Adicionar texto com prefixo do speaker (reaproveitado no full_text)
             text_with_speaker = f"Speaker {speaker}: {text}"
             speaker_entry["texts"].append(text_with_speaker)
+            full_text_parts.append(text_with_speaker)
 
         # Reconstruir full_text com prefixos de speakers
-        if result["phrases"]:
-            full_text_parts = []
-            for phrase in result["phrases"]:
-                speaker_id = phrase["speaker"]
-                text = phrase["text"]
-                full_text_parts.append(f"Speaker {speaker_id}: {text}")
+        if full_text_parts:
             result["full_text"] = " ".join(full_text_parts)
 
         return result
@@ -354,13 +356,10 @@ class AzureSpeechService:
 
         Ex: "PT1H2M3.4S" -> 3723.4 segundos
         """
-        import re
-
         if not duration_str or duration_str == "PT0S":
             return 0.0
 
-        pattern = r'PT(?:(\d+)H)?(?:(\d+)M)?(?:([\d.]+)S)?'
-        match = re.match(pattern, duration_str)
+        match = _DURATION_RE.match(duration_str)
 
         if not match:
             return 0.0
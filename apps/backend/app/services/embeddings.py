@@ -5,9 +5,11 @@ Indexa chunks de transcrições para permitir RAG (Retrieval Augmented Generatio
 
 import os
 import pickle
+import threading
 from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 import faiss
+from cachetools import LRUCache
 from loguru import logger
 
 from app.core.config import settings
@@ -27,6 +29,11 @@ class EmbeddingsService:
         self.base_path = base_path or settings.FAISS_PATH
         self.dimension = 1536  # Dimensão dos embeddings ada-002
 
+        # Jobs cujo índice já foi visto no disco (só resultados positivos são
+        # cacheados: índices também são criados pelo worker, em outro processo)
+        self._existing_indexes: LRUCache = LRUCache(maxsize=4096)
+        self._existing_indexes_lock = threading.Lock()
+
         # Garantir que o diretório existe
         os.makedirs(self.base_path, exist_ok=True)
 
@@ -114,10 +121,7 @@ class EmbeddingsService:
 
         # Gerar embeddings para cada chunk
         logger.info(f"Gerando embeddings para {len(chunks)} chunks")
-        embeddings = azure_openai_service.generate_embeddings_batch(chunks)
-
-        # Converter para numpy array
-        embeddings_array = np.array(embeddings, dtype=np.float32)
+        embeddings_array = azure_openai_service.generate_embeddings_batch(chunks)
 
         # Criar índice FAISS
         # Usando IndexFlatIP (Inner Product) para busca de similaridade
@@ -227,9 +231,7 @@ class EmbeddingsService:
 
         # Adicionar novos chunks
         new_chunks = self.chunk_text(new_text)
-        new_embeddings = azure_openai_service.generate_embeddings_batch(new_chunks)
-
-        embeddings_array = np.array(new_embeddings, dtype=np.float32)
+        embeddings_array = azure_openai_service.generate_embeddings_batch(new_chunks)
         faiss.normalize_L2(embeddings_array)
 
         index.add(embeddings_array)
@@ -265,6 +267,9 @@ class EmbeddingsService:
             if os.path.exists(metadata_path):
                 os.remove(metadata_path)
 
+            with self._existing_indexes_lock:
+                self._existing_indexes.pop(job_id, None)
+
             logger.info(f"Índice deletado para job {job_id}")
 
             return True
@@ -275,8 +280,18 @@ class EmbeddingsService:
 
     def index_exists(self, job_id: str) -> bool:
         """Verifica se um índice existe para um job"""
+        with self._existing_indexes_lock:
+            if job_id in self._existing_indexes:
+                return True
+
         index_path = self._get_index_path(job_id)
-        return os.path.exists(index_path)
+        exists = os.path.exists(index_path)
+
+        if exists:
+            with self._existing_indexes_lock:
+                self._existing_indexes[job_id] = True
+
+        return exists
 
     def _get_index_path(self, job_id: str) -> str:
         """Retorna o caminho do arquivo de índice"""
@@ -311,6 +326,9 @@ class EmbeddingsService:
             with open(metadata_path, "wb") as f:
                 pickle.dump(metadata, f)
 
+            with self._existing_indexes_lock:
+                self._existing_indexes[job_id] = True
+
             logger.info(f"Índice salvo em: {index_path}")
 
         except Exception as e:
@@ -0,0 +1,82 @@
+"""
+Serviço de eventos de jobs via Redis Pub/Sub.
+
+Os workers Celery publicam no canal `job:{job_id}` a cada mudança de status,
+progresso, resumo ou ata; a API repassa esses eventos aos clientes via SSE,
+substituindo o polling das rotas GET.
+"""
+
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+import orjson
+from loguru import logger
+
+from app.core.redis import get_async_redis, get_redis
+
+
+class JobEventsService:
+    """Publicação (workers) e assinatura (API) de eventos de jobs"""
+
+    @staticmethod
+    def channel(job_id: str) -> str:
+        """Nome do canal Pub/Sub de um job"""
+        return f"job:{job_id}"
+
+    def publish(self, job_id: str, event: str, **data: Any) -> None:
+        """
+        Publica um evento do job (uso síncrono, nos workers Celery).
+
+        Falhas de publicação são apenas logadas: o estado já foi salvo no
+        banco e os clientes ainda podem consultar as rotas GET.
+
+        Args:
+            job_id: ID do job
+            event: Tipo do evento (status, summary, meeting_minutes)
+            **data: Campos adicionais do evento (status, progress, etc.)
+        """
+        message = orjson.dumps({"job_id": job_id, "event": event, **data})
+
+        try:
+            get_redis().publish(self.channel(job_id), message)
+        except Exception as e:
+            logger.warning(f"[Job {job_id}] Erro ao publicar evento '{event}': {str(e)}")
+
+    async def subscribe(
+        self,
+        job_id: str,
+        initial: Optional[Callable[[], Awaitable[Dict[str, Any]]]] = None,
+        heartbeat_seconds: float = 15.0
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Assina os eventos de um job.
+
+        Args:
+            job_id: ID do job
+            initial: Função que lê o estado atual do job; chamada só depois da
+                assinatura, para que nenhuma publicação se perca entre leitura e assinatura
+            heartbeat_seconds: Intervalo máximo sem mensagens antes de emitir None
+
+        Yields:
+            Evento decodificado, ou None a cada heartbeat_seconds sem eventos
+            (para o chamador manter a conexão viva)
+        """
+        pubsub = get_async_redis().pubsub()
+        await pubsub.subscribe(self.channel(job_id))
+
+        try:
+            if initial is not None:
+                yield await initial()
+
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=heartbeat_seconds
+                )
+                yield orjson.loads(message["data"]) if message else None
+        finally:
+            await pubsub.unsubscribe(self.channel(job_id))
+            await pubsub.reset()
+
+
+# Instância global do serviço
+job_events_service = JobEventsService()
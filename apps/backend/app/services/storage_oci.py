@@ -8,7 +8,7 @@ from typing import Optional, BinaryIO
 from datetime import datetime, timedelta
 from loguru import logger
 import oci
-from oci.object_storage import ObjectStorageClient
+from oci.object_storage import ObjectStorageClient, UploadManager
 from oci.object_storage.models import CreatePreauthenticatedRequestDetails
 
 from app.core.config import settings
@@ -17,12 +17,16 @@ from app.core.config import settings
 class OCIStorageService:
     """Cliente para OCI Object Storage"""
 
+    # Acima disso o upload é feito em partes enviadas em paralelo (multipart)
+    MULTIPART_THRESHOLD_BYTES = 128 * 1024 * 1024
+
     def __init__(self):
         """
         Inicializa o cliente OCI usando o config file.
         Espera arquivo de configuração em ~/.oci/config por padrão.
         """
         self.client = None
+        self.upload_manager = None
         self.namespace = None
         self.bucket_name = None
         self.compartment_id = None
@@ -37,6 +41,7 @@ class OCIStorageService:
 
             # Inicializar cliente Object Storage
             self.client = ObjectStorageClient(config)
+            self.upload_manager = UploadManager(self.client, allow_parallel_uploads=True)
             self.namespace = settings.OCI_NAMESPACE
             self.bucket_name = settings.OCI_BUCKET
             self.compartment_id = settings.OCI_COMPARTMENT_OCID
@@ -65,15 +70,20 @@ class OCIStorageService:
         self,
         file_content: BinaryIO,
         object_name: str,
-        content_type: Optional[str] = None
+        content_type: Optional[str] = None,
+        size: Optional[int] = None
     ) -> str:
         """
         Faz upload de um arquivo para o OCI Object Storage.
 
+        Arquivos com size acima de MULTIPART_THRESHOLD_BYTES são enviados em
+        partes paralelas pelo UploadManager do SDK, lendo o stream aos poucos.
+
         Args:
             file_content: Conteúdo do arquivo (file-like object)
             object_name: Nome do objeto no bucket (ex: "uploads/audio_123.mp3")
             content_type: MIME type do arquivo (ex: "audio/mpeg")
+            size: Tamanho do conteúdo em bytes, se conhecido
 
         Returns:
             Nome completo do objeto no bucket
@@ -91,13 +101,22 @@ class OCIStorageService:
                 kwargs["content_type"] = content_type
 
             # Upload
-            self.client.put_object(
-                namespace_name=self.namespace,
-                bucket_name=self.bucket_name,
-                object_name=object_name,
-                put_object_body=file_content,
-                **kwargs
-            )
+            if size is not None and size > self.MULTIPART_THRESHOLD_BYTES:
+                self.upload_manager.upload_stream(
+                    self.namespace,
+                    self.bucket_name,
+                    object_name,
+                    file_content,
+                    **kwargs
+                )
+            else:
+                self.client.put_object(
+                    namespace_name=self.namespace,
+                    bucket_name=self.bucket_name,
+                    object_name=object_name,
+                    put_object_body=file_content,
+                    **kwargs
+                )
 
             logger.info(f"Upload concluído: {object_name}")
 
@@ -312,21 +331,24 @@ class OCIStorageService:
             logger.error(f"Erro ao obter metadados: {str(e)}")
             raise
 
-    def generate_upload_path(self, user_id: int, filename: str) -> str:
+    def generate_upload_path(self, user_id: int, filename: str, job_id: Optional[str] = None) -> str:
         """
-        Gera um caminho único para upload baseado no user_id e timestamp.
+        Gera um caminho único para upload baseado no user_id e no job_id
+        (ou no timestamp, se o job_id não for informado).
 
         Args:
             user_id: ID do usuário
             filename: Nome original do arquivo
+            job_id: ID do job do upload
 
         Returns:
-            Caminho no formato: "uploads/{user_id}/{timestamp}_{filename}"
+            Caminho no formato: "uploads/{user_id}/{job_id}_{filename}"
+            (ou "uploads/{user_id}/{timestamp}_{filename}")
         """
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        prefix = job_id or datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         # Sanitizar filename
         safe_filename = "".join(c for c in filename if c.isalnum() or c in "._-")
-        path = f"uploads/{user_id}/{timestamp}_{safe_filename}"
+        path = f"uploads/{user_id}/{prefix}_{safe_filename}"
 
         return path
 
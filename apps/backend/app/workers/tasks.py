@@ -5,18 +5,29 @@ Tasks Celery para processamento assíncrono de transcrições.
 import asyncio
 import json
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Tuple
+import orjson
 from celery import Task
 from loguru import logger
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session, undefer_group
 
 from celery_app import celery_app
-from app.core.database import SessionLocal, Job
-from app.core.utils import now
+from app.core.config import settings
+from app.core.database import JOB_CONTENT_GROUP, SessionLocal, Job
+from app.core.redis import get_redis, llm_cache_key, result_cache_key
+from app.core.utils import (
+    apply_speaker_names,
+    apply_transcription_overlay,
+    now,
+    overlay_filename,
+    overlay_version
+)
 from app.services.azure_speech import azure_speech_service
 from app.services.azure_openai import azure_openai_service
 from app.services.storage_oci import oci_storage_service
 from app.services.embeddings import embeddings_service
+from app.services.job_events import job_events_service
 
 
 class DatabaseTask(Task):
@@ -35,6 +46,55 @@ class DatabaseTask(Task):
             self._db = None
 
 
+def _publish_status(job: Job) -> None:
+    """Notifica os clientes (SSE) do status/progresso atual do job"""
+    job_events_service.publish(
+        job.id,
+        "status",
+        status=job.status,
+        progress=job.progress,
+        error_message=job.error_message
+    )
+
+
+def _generate_with_cache(
+    kind: str,
+    job_id: str,
+    transcript: str,
+    max_tokens: int,
+    temperature: float,
+    generate: Callable[[], Any]
+) -> Tuple[Any, bool]:
+    """
+    Gera um resumo/ata com cache no Redis por texto e parâmetros.
+
+    Regerar com a mesma transcrição e parâmetros (ex.: após deletar o resumo)
+    não chama o Azure OpenAI de novo. Falhas do Redis só desativam o cache.
+
+    Returns:
+        Tuple[Any, bool]: (resultado, se veio do cache)
+    """
+    redis = get_redis()
+    cache_key = llm_cache_key(kind, job_id, transcript, max_tokens, temperature)
+
+    try:
+        cached = redis.get(cache_key)
+        if cached is not None:
+            logger.info(f"[Job {job_id}] {kind} carregado do cache")
+            return orjson.loads(cached), True
+    except Exception as e:
+        logger.warning(f"[Job {job_id}] Erro ao ler cache {cache_key}: {str(e)}")
+
+    result = generate()
+
+    try:
+        redis.setex(cache_key, settings.LLM_CACHE_TTL_SECONDS, orjson.dumps(result))
+    except Exception as e:
+        logger.warning(f"[Job {job_id}] Erro ao gravar cache {cache_key}: {str(e)}")
+
+    return result, False
+
+
 @celery_app.task(
     bind=True,
     base=DatabaseTask,
@@ -77,6 +137,7 @@ def process_transcription_task(self, job_id: str, file_url: str) -> Dict[str, An
         job.started_at = now()
         job.progress = 0.1
         self.db.commit()
+        _publish_status(job)
 
         logger.info(f"[Job {job_id}] Status atualizado para PROCESSING")
 
@@ -95,6 +156,7 @@ def process_transcription_task(self, job_id: str, file_url: str) -> Dict[str, An
 
         job.progress = 0.2
         self.db.commit()
+        _publish_status(job)
 
         # 3. Criar job de transcrição no Azure Speech
         logger.info(f"[Job {job_id}] Criando job no Azure Speech Batch API")
@@ -109,6 +171,7 @@ def process_transcription_task(self, job_id: str, file_url: str) -> Dict[str, An
         job.azure_job_id = azure_job_id
         job.progress = 0.3
         self.db.commit()
+        _publish_status(job)
 
         logger.info(f"[Job {job_id}] Azure job criado: {azure_job_id}")
 
@@ -131,6 +194,7 @@ def process_transcription_task(self, job_id: str, file_url: str) -> Dict[str, An
                 progress = 0.3 + (elapsed / max_wait) * 0.5
                 job.progress = min(progress, 0.8)
                 self.db.commit()
+                _publish_status(job)
 
                 logger.info(
                     f"[Job {job_id}] Azure status: {status}, "
@@ -160,6 +224,7 @@ def process_transcription_task(self, job_id: str, file_url: str) -> Dict[str, An
 
         job.progress = 0.85
         self.db.commit()
+        _publish_status(job)
 
         # 6. Parsear transcrição
         logger.info(f"[Job {job_id}] Parseando transcrição com diarização")
@@ -202,6 +267,7 @@ def process_transcription_task(self, job_id: str, file_url: str) -> Dict[str, An
 
         job.progress = 0.9
         self.db.commit()
+        _publish_status(job)
 
         # 8. Gerar embeddings e indexar no FAISS
         logger.info(f"[Job {job_id}] Criando índice FAISS")
@@ -224,6 +290,7 @@ def process_transcription_task(self, job_id: str, file_url: str) -> Dict[str, An
         job.transcription_text = full_text
         job.duration_seconds = duration_seconds
         self.db.commit()
+        _publish_status(job)
 
         logger.info(f"[Job {job_id}] Processamento concluído com sucesso!")
 
@@ -245,6 +312,7 @@ def process_transcription_task(self, job_id: str, file_url: str) -> Dict[str, An
             job.error_message = str(e)
             job.completed_at = now()
             self.db.commit()
+            _publish_status(job)
 
         # Retry se não excedeu tentativas
         raise self.retry(exc=e, countdown=60)
@@ -277,7 +345,12 @@ def generate_summary_task(
         logger.info(f"[Job {job_id}] Gerando resumo")
 
         # Buscar job
-        job = self.db.query(Job).filter(Job.id == job_id).first()
+        job = (
+            self.db.query(Job)
+            .options(undefer_group(JOB_CONTENT_GROUP))
+            .filter(Job.id == job_id)
+            .first()
+        )
         if not job:
             raise ValueError(f"Job {job_id} não encontrado")
 
@@ -298,26 +371,34 @@ def generate_summary_task(
         if not transcript:
             raise ValueError("Transcrição não disponível")
 
-        summary = azure_openai_service.summarize(
-            transcript=transcript,
-            max_tokens=max_tokens,
-            temperature=temperature
+        summary, cached = _generate_with_cache(
+            "summary", job_id, transcript, max_tokens, temperature,
+            lambda: azure_openai_service.summarize(
+                transcript=transcript,
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
         )
 
         # Salvar no banco
         job.summary = summary
         self.db.commit()
+        job_events_service.publish(job_id, "summary", ready=True)
 
         logger.info(f"[Job {job_id}] Resumo gerado e salvo")
 
         return {
             "job_id": job_id,
             "summary": summary,
-            "cached": False
+            "cached": cached
         }
 
     except Exception as e:
         logger.error(f"[Job {job_id}] Erro ao gerar resumo: {str(e)}")
+
+        if self.request.retries >= self.max_retries:
+            job_events_service.publish(job_id, "summary", ready=False, error=str(e))
+
         raise self.retry(exc=e, countdown=30)
 
 
@@ -350,7 +431,12 @@ def generate_meeting_minutes_task(
         logger.info(f"[Job {job_id}] Gerando ata de reunião")
 
         # Buscar job
-        job = self.db.query(Job).filter(Job.id == job_id).first()
+        job = (
+            self.db.query(Job)
+            .options(undefer_group(JOB_CONTENT_GROUP))
+            .filter(Job.id == job_id)
+            .first()
+        )
         if not job:
             raise ValueError(f"Job {job_id} não encontrado")
 
@@ -360,10 +446,9 @@ def generate_meeting_minutes_task(
         # Verificar se já tem ata
         if job.meeting_minutes:
             logger.info(f"[Job {job_id}] Ata já existe, retornando cached")
-            import json
             return {
                 "job_id": job_id,
-                "meeting_minutes": json.loads(job.meeting_minutes),
+                "meeting_minutes": job.meeting_minutes,
                 "cached": True
             }
 
@@ -372,27 +457,182 @@ def generate_meeting_minutes_task(
         if not transcript:
             raise ValueError("Transcrição não disponível")
 
-        minutes = azure_openai_service.generate_meeting_minutes(
-            transcript=transcript,
-            max_tokens=max_tokens,
-            temperature=temperature
+        minutes, cached = _generate_with_cache(
+            "meeting_minutes", job_id, transcript, max_tokens, temperature,
+            lambda: azure_openai_service.generate_meeting_minutes(
+                transcript=transcript,
+                max_tokens=max_tokens,
+                temperature=temperature
+            ).model_dump()
         )
 
-        # Salvar no banco como JSON string
-        import json
-        job.meeting_minutes = json.dumps(minutes, ensure_ascii=False)
+        # Salvar no banco (coluna JSON)
+        job.meeting_minutes = minutes
+        job.meeting_minutes_status = None
         self.db.commit()
+        job_events_service.publish(job_id, "meeting_minutes", ready=True)
 
         logger.info(f"[Job {job_id}] Ata de reunião gerada e salva")
 
         return {
             "job_id": job_id,
             "meeting_minutes": minutes,
-            "cached": False
+            "cached": cached
         }
 
     except Exception as e:
         logger.error(f"[Job {job_id}] Erro ao gerar ata de reunião: {str(e)}")
+
+        # Sem novas tentativas: liberar o job para uma nova solicitação
+        if self.request.retries >= self.max_retries:
+            self.db.rollback()
+            job = self.db.query(Job).filter(Job.id == job_id).first()
+            if job:
+                job.meeting_minutes_status = None
+                self.db.commit()
+            job_events_service.publish(job_id, "meeting_minutes", ready=False, error=str(e))
+
+        raise self.retry(exc=e, countdown=30)
+
+
+@celery_app.task(
+    bind=True,
+    base=DatabaseTask,
+    name="rebuild_faiss_index",
+    max_retries=2
+)
+def rebuild_faiss_index_task(self, job_id: str) -> Dict[str, Any]:
+    """
+    Task para recriar o índice FAISS de um job (ex.: após renomear speakers).
+
+    Usa o texto editado, se existir, com os nomes customizados aplicados.
+
+    Args:
+        job_id: ID do job
+
+    Returns:
+        Dict com o resultado da reindexação
+    """
+    try:
+        logger.info(f"[Job {job_id}] Recriando índice FAISS")
+
+        # Buscar job
+        job = (
+            self.db.query(Job)
+            .options(undefer_group(JOB_CONTENT_GROUP))
+            .filter(Job.id == job_id)
+            .first()
+        )
+        if not job:
+            raise ValueError(f"Job {job_id} não encontrado")
+
+        # Obter texto com nomes customizados aplicados
+        transcription_text = job.edited_transcription or job.transcription_text
+        if not transcription_text:
+            logger.warning(f"[Job {job_id}] Sem texto para indexar")
+            return {"job_id": job_id, "indexed": False}
+
+        if job.speaker_names:
+            transcription_text = apply_speaker_names(transcription_text, job.speaker_names)
+
+        embeddings_service.create_index_for_job(
+            job_id=job_id,
+            text=transcription_text,
+            metadata={"filename": job.filename}
+        )
+
+        logger.info(f"[Job {job_id}] Índice FAISS recriado")
+
+        return {"job_id": job_id, "indexed": True}
+
+    except Exception as e:
+        logger.error(f"[Job {job_id}] Erro ao recriar índice FAISS: {str(e)}")
+        raise self.retry(exc=e, countdown=30)
+
+
+@celery_app.task(
+    bind=True,
+    base=DatabaseTask,
+    name="materialize_overlay",
+    max_retries=2
+)
+def materialize_overlay_task(self, job_id: str) -> Dict[str, Any]:
+    """
+    Task para gerar o JSON da transcrição com as alterações do usuário
+    (texto editado e nomes de speakers) já aplicadas.
+
+    O arquivo é salvo no OCI como transcription.overlayed.{versão}.json e
+    colocado no cache do Redis; as rotas de leitura o servem direto quando
+    a versão bate com o estado atual do job.
+
+    Args:
+        job_id: ID do job
+
+    Returns:
+        Dict com a versão materializada
+    """
+    try:
+        job = (
+            self.db.query(Job.id, Job.edited_transcription, Job.speaker_names, Job.overlay_version)
+            .filter(Job.id == job_id)
+            .first()
+        )
+        if not job:
+            raise ValueError(f"Job {job_id} não encontrado")
+
+        version = overlay_version(job.edited_transcription, job.speaker_names)
+        if version is None or version == job.overlay_version:
+            return {"job_id": job_id, "overlay_version": job.overlay_version}
+
+        logger.info(f"[Job {job_id}] Materializando alterações da transcrição ({version})")
+
+        # Aplicar alterações sobre o JSON original
+        original = oci_storage_service.download_file(
+            oci_storage_service.generate_result_path(job_id, "transcription.json")
+        )
+        transcription_data = orjson.loads(original)
+        transcription_data["full_text"], transcription_data["speakers"] = apply_transcription_overlay(
+            transcription_data,
+            job.edited_transcription,
+            job.speaker_names
+        )
+        content = orjson.dumps(transcription_data, option=orjson.OPT_INDENT_2)
+
+        filename = overlay_filename(version)
+        oci_storage_service.upload_file(
+            file_content=content,
+            object_name=oci_storage_service.generate_result_path(job_id, filename),
+            content_type="application/json"
+        )
+
+        try:
+            get_redis().setex(result_cache_key(job_id, filename), settings.RESULT_CACHE_TTL_SECONDS, content)
+        except Exception as e:
+            logger.warning(f"[Job {job_id}] Erro ao gravar cache da transcrição: {str(e)}")
+
+        # Registrar a versão sem mexer em updated_at: o conteúdo servido é o mesmo
+        self.db.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .values(overlay_version=version, updated_at=Job.updated_at)
+        )
+        self.db.commit()
+
+        # Remover a versão anterior, que não é mais servida
+        if job.overlay_version:
+            try:
+                oci_storage_service.delete_file(
+                    oci_storage_service.generate_result_path(job_id, overlay_filename(job.overlay_version))
+                )
+            except Exception as e:
+                logger.warning(f"[Job {job_id}] Erro ao remover versão anterior: {str(e)}")
+
+        logger.info(f"[Job {job_id}] Alterações da transcrição materializadas")
+
+        return {"job_id": job_id, "overlay_version": version}
+
+    except Exception as e:
+        logger.error(f"[Job {job_id}] Erro ao materializar alterações da transcrição: {str(e)}")
         raise self.retry(exc=e, countdown=30)
 
 
@@ -415,11 +655,15 @@ def cleanup_old_jobs_task(days: int = 90) -> Dict[str, int]:
     try:
         cutoff_date = now() - timedelta(days=days)
 
+        # Jobs UPLOADING há mais de um dia: upload interrompido (processo da API
+        # morreu/reiniciou), nunca enfileirado
+        stale_upload_date = now() - timedelta(days=1)
+
         # Buscar jobs antigos
-        old_jobs = db.query(Job).filter(
-            Job.created_at < cutoff_date,
-            Job.status.in_(["COMPLETED", "FAILED"])
-        ).all()
+        old_jobs = db.query(Job).filter(or_(
+            and_(Job.created_at < cutoff_date, Job.status.in_(["COMPLETED", "FAILED"])),
+            and_(Job.created_at < stale_upload_date, Job.status == "UPLOADING")
+        )).all()
 
         deleted_files = 0
         deleted_indices = 0
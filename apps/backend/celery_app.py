@@ -25,6 +25,9 @@ celery_app.conf.update(
     task_soft_time_limit=settings.CELERY_TASK_SOFT_TIME_LIMIT,
     worker_prefetch_multiplier=1,  # Processar uma task por vez
     worker_max_tasks_per_child=10,  # Reiniciar worker após N tasks (evitar memory leaks)
+    broker_pool_limit=50,  # Conexões reaproveitadas pelos publishers (API) sob uploads concorrentes
+    # Transcrições (longas) em fila própria, para não disputar com resumo/ata/reindexação
+    task_routes={"process_transcription": {"queue": "transcription"}},
 )
 
 if __name__ == "__main__":
@@ -57,6 +57,8 @@ export default function DashboardPage() {
             Processando {Math.round(progress * 100)}%
           </span>
         )
+      case 'UPLOADING':
+        return <span className="badge-warning">⬆ Enviando</span>
       case 'QUEUED':
         return <span className="badge-warning">⏳ Na fila</span>
       case 'FAILED':
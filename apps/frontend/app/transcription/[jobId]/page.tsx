@@ -69,94 +69,121 @@ export default function TranscriptionPage() {
     }
   }
 
-  const loadSummary = async () => {
+  const loadSummary = async (): Promise<boolean> => {
     try {
       const response = await api.summary.get(jobId)
       setSummary(response.data.summary)
+      return true
     } catch (error) {
       // Summary não existe ainda, tudo bem
+      return false
     }
   }
 
-  const loadMeetingMinutes = async () => {
+  const loadMeetingMinutes = async (): Promise<boolean> => {
     try {
       const response = await api.meetingMinutes.get(jobId)
       setMeetingMinutes(response.data.meeting_minutes)
+      return true
     } catch (error) {
       // Ata não existe ainda, tudo bem
+      return false
     }
   }
 
-  const generateSummary = async () => {
-    setLoadingSummary(true)
-    try {
-      const response = await api.summary.generate(jobId)
-      setSummary(response.data.summary)
-
-      // Se foi enfileirado, fazer polling
-      if (!response.data.cached) {
-        const interval = setInterval(async () => {
-          try {
-            const res = await api.summary.get(jobId)
-            if (res.data.summary && !res.data.summary.includes('sendo gerado')) {
-              setSummary(res.data.summary)
-              clearInterval(interval)
-              setLoadingSummary(false)
-            }
-          } catch (error) {
-            // Continuar tentando
-          }
-        }, 5000)
-
-        // Timeout após 2 minutos
-        setTimeout(() => {
-          clearInterval(interval)
-          setLoadingSummary(false)
-        }, 120000)
-      } else {
-        setLoadingSummary(false)
+  // Dispara a geração (resumo ou ata) e aguarda o evento de conclusão do worker.
+  // O POST só sai depois que a assinatura está ativa (snapshot inicial recebido),
+  // para não perder um evento publicado logo em seguida. Se o stream falhar,
+  // volta ao polling do GET; no timeout, faz uma última leitura.
+  const generateAndWait = async (
+    kind: 'summary' | 'meeting_minutes',
+    generate: () => Promise<{ data: any }>,
+    apply: (data: any) => void,
+    load: () => Promise<boolean>,
+    setBusy: (busy: boolean) => void
+  ) => {
+    setBusy(true)
+
+    let done = false
+    let queued = false
+    let timeout: ReturnType<typeof setTimeout> | undefined
+    let interval: ReturnType<typeof setInterval> | undefined
+
+    const finish = async (reload: boolean) => {
+      if (done) return
+      done = true
+      subscription.unsubscribe()
+      clearTimeout(timeout)
+      clearInterval(interval)
+      if (reload) {
+        await load()
       }
-    } catch (error) {
-      console.error('Erro ao gerar resumo:', error)
-      setLoadingSummary(false)
+      setBusy(false)
     }
-  }
 
-  const generateMeetingMinutes = async () => {
-    setLoadingMinutes(true)
+    const startPolling = () => {
+      if (interval || done) return
+      interval = setInterval(async () => {
+        if (await load()) finish(false)
+      }, 5000)
+    }
+
+    const subscription = api.jobs.subscribeEvents(
+      jobId,
+      (event) => {
+        if (event.event === kind) {
+          finish(Boolean(event.ready))
+        }
+      },
+      () => {
+        // Stream indisponível (ex.: token expirado): seguir por polling
+        if (queued) startPolling()
+      }
+    )
+
+    // Sem snapshot em 10s (ou com erro), o stream é tratado como indisponível
+    const streaming = await Promise.race([
+      subscription.ready.then(() => true, () => false),
+      new Promise<boolean>((resolve) => setTimeout(() => resolve(false), 10000)),
+    ])
+
     try {
-      const response = await api.meetingMinutes.generate(jobId)
-      setMeetingMinutes(response.data.meeting_minutes)
+      const response = await generate()
+      apply(response.data)
 
-      // Se foi enfileirado, fazer polling
-      if (!response.data.cached) {
-        const interval = setInterval(async () => {
-          try {
-            const res = await api.meetingMinutes.get(jobId)
-            if (res.data.meeting_minutes && res.data.meeting_minutes.title !== 'Gerando...') {
-              setMeetingMinutes(res.data.meeting_minutes)
-              clearInterval(interval)
-              setLoadingMinutes(false)
-            }
-          } catch (error) {
-            // Continuar tentando
-          }
-        }, 5000)
-
-        // Timeout após 2 minutos
-        setTimeout(() => {
-          clearInterval(interval)
-          setLoadingMinutes(false)
-        }, 120000)
-      } else {
-        setLoadingMinutes(false)
+      if (response.data.cached) {
+        finish(false)
+        return
       }
+
+      // Enfileirado: aguardar o evento (timeout após 2 minutos)
+      queued = true
+      timeout = setTimeout(() => finish(true), 120000)
+      if (!streaming) startPolling()
     } catch (error) {
-      console.error('Erro ao gerar ata de reunião:', error)
-      setLoadingMinutes(false)
+      console.error(`Erro ao gerar ${kind === 'summary' ? 'resumo' : 'ata de reunião'}:`, error)
+      finish(false)
     }
   }
 
+  const generateSummary = () =>
+    generateAndWait(
+      'summary',
+      () => api.summary.generate(jobId),
+      (data) => setSummary(data.summary),
+      loadSummary,
+      setLoadingSummary
+    )
+
+  const generateMeetingMinutes = () =>
+    generateAndWait(
+      'meeting_minutes',
+      () => api.meetingMinutes.generate(jobId),
+      (data) => setMeetingMinutes(data.meeting_minutes),
+      loadMeetingMinutes,
+      setLoadingMinutes
+    )
+
   const downloadSummaryDocx = async () => {
     setDownloadingSummary(true)
     try {
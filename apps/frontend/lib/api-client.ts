@@ -89,6 +89,106 @@ apiClient.interceptors.response.use(
   }
 );
 
+// ============================================================================
+// Eventos de jobs (SSE)
+// ============================================================================
+
+export interface JobEvent {
+  job_id: string;
+  event: 'status' | 'summary' | 'meeting_minutes';
+  status?: string;
+  progress?: number;
+  error_message?: string | null;
+  ready?: boolean;
+  error?: string;
+}
+
+export interface JobEventsSubscription {
+  /**
+   * Resolve quando o snapshot inicial (evento `status`) chega, ou seja, quando
+   * a assinatura já está ativa no servidor; rejeita se o stream não abrir.
+   */
+  ready: Promise<void>;
+  /** Encerra a assinatura */
+  unsubscribe: () => void;
+}
+
+/**
+ * Assina o stream SSE de eventos de um job (status/progresso, resumo e ata).
+ * Usa fetch em vez de EventSource para poder enviar o header Authorization.
+ * `onError` é chamado se o stream falhar ou terminar antes de ser encerrado.
+ */
+export function subscribeJobEvents(
+  jobId: string,
+  onEvent: (event: JobEvent) => void,
+  onError?: (error: Error) => void
+): JobEventsSubscription {
+  const controller = new AbortController();
+
+  let resolveReady!: () => void;
+  let rejectReady!: (error: Error) => void;
+  const ready = new Promise<void>((resolve, reject) => {
+    resolveReady = resolve;
+    rejectReady = reject;
+  });
+
+  (async () => {
+    const token = typeof window !== 'undefined' ? localStorage.getItem('access_token') : null;
+    const response = await fetch(`${API_URL}/transcriptions/${jobId}/events`, {
+      headers: token ? { Authorization: `Bearer ${token}` } : {},
+      signal: controller.signal,
+    });
+
+    if (!response.ok || !response.body) {
+      throw new Error(`Falha ao abrir stream de eventos: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+
+      buffer += decoder.decode(value, { stream: true });
+
+      // Eventos SSE são separados por uma linha em branco
+      let boundary: number;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        const data = rawEvent
+          .split('\n')
+          .filter((line) => line.startsWith('data: '))
+          .map((line) => line.slice(6))
+          .join('\n');
+
+        if (data) {
+          const event: JobEvent = JSON.parse(data);
+          // O primeiro evento é o snapshot lido após o SUBSCRIBE no Redis
+          resolveReady();
+          onEvent(event);
+        }
+      }
+    }
+
+    throw new Error('Stream de eventos encerrado pelo servidor');
+  })().catch((error) => {
+    if (error.name === 'AbortError') return;
+
+    console.error('Erro no stream de eventos do job:', error);
+    rejectReady(error);
+    onError?.(error);
+  });
+
+  // Evitar "unhandled rejection" quando o chamador não aguarda o ready
+  ready.catch(() => {});
+
+  return { ready, unsubscribe: () => controller.abort() };
+}
+
 // ============================================================================
 // API Methods
 // ============================================================================
@@ -131,6 +231,12 @@ export const api = {
   // Jobs
   jobs: {
     getStatus: (jobId: string) => apiClient.get(`/jobs/${jobId}/status`),
+
+    subscribeEvents: (
+      jobId: string,
+      onEvent: (event: JobEvent) => void,
+      onError?: (error: Error) => void
+    ) => subscribeJobEvents(jobId, onEvent, onError),
   },
 
   // Transcriptions